@@ -1,4 +1,3 @@
-import pygame
 import time
 from resources import RESOURCES, TEXTURES  # Assuming resources and textures are managed similarly
 from configs import IS_PLAY_SLEEP_ANIMATION
@@ -24,11 +23,12 @@ class AgentCommand:
         return command
 
 class Agent:
+    __slots__ = ("pos", "birth_ts")
+
     def __init__(self):
         resources = RESOURCES.get()
         lvl = resources.lvl_info
         self.pos = lvl.agent  # (x, y)
-        self.game_size = lvl.size  # (width, height)
         self.birth_ts = time.time()
 
     def update(self, command, has_all_keys):
@@ -49,33 +49,36 @@ class Agent:
             new_loc[1] -= 1
 
         # Ensure new position is not a wall or a door (unless all keys are collected)
-        is_not_wall = not resources.lvl_map.get_tile("LAYER_WALLS", new_loc[0], new_loc[1])
-        is_not_door = not resources.lvl_map.get_tile("LAYER_DOOR", new_loc[0], new_loc[1])
-
-        if is_not_wall and (is_not_door or has_all_keys) and self.is_in_bounds(new_loc[0], new_loc[1]):
+        if resources.tilemap.is_passable(new_loc[0], new_loc[1], has_all_keys):
             self.pos = tuple(new_loc)
 
-    def draw(self, scale_factor, offset_x, offset_y):
+    @staticmethod
+    def draw(pos, birth_ts, scale_factor, offset_x, offset_y):
+        """
+        :param pos: Tile the agent is on.
+        :param birth_ts: When the agent was born, it sleeps for its first seconds.
+        """
+        import pygame
+
         textures = TEXTURES.get()
-        elapsed_time = time.time() - self.birth_ts
+        elapsed_time = time.time() - birth_ts
 
         if elapsed_time < 1:
-            texture = textures.agent_sleep1_texture
+            sprite = "agent_sleep1"
         elif elapsed_time < 2:
-            texture = textures.agent_sleep2_texture
+            sprite = "agent_sleep2"
         elif elapsed_time < 3:
-            texture = textures.agent_sleep3_texture
+            sprite = "agent_sleep3"
         else:
-            texture = textures.agent_texture
+            sprite = "agent"
 
         if not IS_PLAY_SLEEP_ANIMATION:
-            texture = textures.agent_texture
+            sprite = "agent"
 
-        texture_rect = texture.get_rect()
-        draw_x = self.pos[0] * scale_factor + offset_x
-        draw_y = self.pos[1] * scale_factor + offset_y
+        draw_x = pos[0] * scale_factor + offset_x
+        draw_y = pos[1] * scale_factor + offset_y
 
-        pygame.Surface.blit(pygame.display.get_surface(), texture, (draw_x, draw_y), texture_rect)
+        textures.atlas.blit(pygame.display.get_surface(), sprite, (draw_x, draw_y), scale_factor)
 
     def is_agent_asleep(self):
         if not IS_PLAY_SLEEP_ANIMATION:
@@ -83,6 +86,3 @@ class Agent:
 
         elapsed_time = time.time() - self.birth_ts
         return elapsed_time < 4
-
-    def is_in_bounds(self, x, y):
-        return 0 <= x < self.game_size[0] and 0 <= y < self.game_size[1]
@@ -0,0 +1,154 @@
+"""
+Struct-of-arrays population engine.
+
+Every game's agent position, key/door flags and step counters live in NumPy
+arrays, and all games advance one frame per batched operation over a move
+matrix of shape (num_games, num_frames). The result is identical to running
+Game.update on each game, so Game.fitness_score gives the same fitness.
+"""
+import numpy as np
+
+from configs import NUM_FRAMES
+from resources import RESOURCES
+from game import Outcome
+from genome import unpack_matrix
+
+# (dx, dy) per AgentCommand: TOP, LEFT, BOTTOM, RIGHT
+MOVE_DX = np.array([0, -1, 0, 1], dtype=np.int32)
+MOVE_DY = np.array([-1, 0, 1, 0], dtype=np.int32)
+
+
+def read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+class BatchState:
+    """Final state of every game in a batch, one array entry per game."""
+
+    def __init__(self, num_games, agent_pos):
+        self.x = np.full(num_games, agent_pos[0], dtype=np.int32)
+        self.y = np.full(num_games, agent_pos[1], dtype=np.int32)
+        self.is_key_collected = np.zeros(num_games, dtype=bool)
+        self.is_complete = np.zeros(num_games, dtype=bool)
+        self.is_dead = np.zeros(num_games, dtype=bool)
+        self.num_key_steps = np.zeros(num_games, dtype=np.int32)
+        self.num_door_steps = np.zeros(num_games, dtype=np.int32)
+
+    def outcomes(self):
+        columns = zip(
+            self.x.tolist(), self.y.tolist(), self.is_key_collected.tolist(), self.is_complete.tolist(),
+            self.is_dead.tolist(), self.num_key_steps.tolist(), self.num_door_steps.tolist(),
+        )
+        return [Outcome((x, y), key, complete, dead, key_steps, door_steps)
+                for x, y, key, complete, dead, key_steps, door_steps in columns]
+
+
+class BatchEngine:
+    def __init__(self, num_frames=NUM_FRAMES):
+        """
+        Build the level grids used by every batch.
+
+        :param num_frames: Number of frames simulated per generation.
+        """
+        resources = RESOURCES.get()
+        lvl = resources.lvl_info
+        width, height = lvl.size
+
+        self.num_frames = num_frames
+        self.active_counts = []  # Games still running on each frame of the last run
+        self.agent = lvl.agent
+        self.key = lvl.key
+        self.door = lvl.door
+
+        self.width = width
+        self.height = height
+
+        # Read-only views of the level's own grids: with a compiled level they are the
+        # mapped file itself, so every process running a BatchEngine shares them
+        tilemap = resources.tilemap
+        self.walls = read_only(np.frombuffer(tilemap.walls, dtype=np.bool_).reshape(height, width))
+        self.doors = read_only(np.frombuffer(tilemap.doors, dtype=np.bool_).reshape(height, width))
+
+        timeline = resources.hazards
+        if timeline.num_mask_frames >= num_frames:
+            mask = np.frombuffer(timeline.mask, dtype=np.bool_, count=num_frames * width * height)
+            self.hazards = read_only(mask.reshape(num_frames, height, width))
+        else:
+            self.hazards = self.build_hazards(timeline, width, height, num_frames)
+
+    @staticmethod
+    def build_hazards(timeline, width, height, num_frames):
+        """
+        Turn the level's enemy timeline into one bitmask per frame.
+
+        :return: Bool array (num_frames, height, width), True where an enemy is on that frame.
+        """
+        hazards = np.zeros((num_frames, height, width), dtype=bool)
+        for frame in range(num_frames):
+            for x, y in timeline.cells_at(frame):
+                hazards[frame, y, x] = True
+        return hazards
+
+    def run(self, moves):
+        """
+        Simulate every game for the full horizon.
+
+        :param moves: Integer array (num_games, num_moves) of AgentCommand values.
+        :return: BatchState with the final state of each game.
+        """
+        moves = np.asarray(moves, dtype=np.uint8)
+        num_games, num_moves = moves.shape
+        state = BatchState(num_games, self.agent)
+
+        # Indices of games that are neither dead nor complete, shrinks as games finish
+        active = np.arange(num_games)
+        self.active_counts = []
+
+        for frame in range(self.num_frames):
+            if active.size == 0:
+                break
+            self.active_counts.append(active.size)
+
+            state.num_door_steps[active] += 1
+            state.num_key_steps[active] += ~state.is_key_collected[active]
+
+            if frame < num_moves:
+                command = moves[active, frame]
+            else:
+                command = np.zeros(active.size, dtype=np.uint8)
+
+            x = state.x[active]
+            y = state.y[active]
+            # A move off the map clamps back onto the agent's own cell, which is always passable
+            new_x = np.clip(x + MOVE_DX[command], 0, self.width - 1)
+            new_y = np.clip(y + MOVE_DY[command], 0, self.height - 1)
+            has_key = state.is_key_collected[active]
+            can_move = ~self.walls[new_y, new_x] & (has_key | ~self.doors[new_y, new_x])
+            x = np.where(can_move, new_x, x)
+            y = np.where(can_move, new_y, y)
+            state.x[active] = x
+            state.y[active] = y
+
+            is_dead = self.hazards[frame, y, x]
+            is_complete = (x == self.door[0]) & (y == self.door[1])
+            state.is_dead[active] = is_dead
+            state.is_key_collected[active] = has_key | ((x == self.key[0]) & (y == self.key[1]))
+            state.is_complete[active] = is_complete
+
+            is_done = is_dead | is_complete
+            if is_done.any():
+                # Finished games report a full horizon of steps, like Game.update
+                if frame + 1 < self.num_frames:
+                    finished = active[is_done]
+                    state.num_door_steps[finished] = self.num_frames
+                    state.num_key_steps[finished] = self.num_frames
+                active = active[~is_done]
+
+        return state
+
+    def evaluate(self, games):
+        """Simulate games and store each final state back into its Game."""
+        moves = unpack_matrix([game.moves for game in games])
+        for game, outcome in zip(games, self.run(moves).outcomes()):
+            game.apply_outcome(outcome)
@@ -0,0 +1,181 @@
+"""
+Benchmark suite.
+
+Runs fixed-seed headless generations for every combination of level,
+population size and horizon (NUM_FRAMES) and writes throughput, time spent in
+the expensive phases and peak memory as JSON. Given a stored baseline it flags
+every case that got slower or bigger than the tolerance allows.
+
+Each case runs in a fresh interpreter: NUM_FRAMES is read once at import time
+by every module that uses it, and peak memory is only meaningful per process.
+
+    python -m escape bench --output baseline.json
+    python -m escape bench --compare baseline.json
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+LEVELS = ("lvl1", "lvl1p", "lvl2", "lvl3", "lvl4", "lvl5")
+POPULATION_SIZES = (10, 1020, 10000)
+HORIZONS = (100, 200, 400)
+
+# Metric -> whether a higher value is better
+METRICS = {
+    "frames_per_sec": True,
+    "games_per_sec": True,
+    "gens_per_sec": True,
+    "ff_solve_s": False,
+    "selection_s": False,
+    "calc_fitness_s": False,
+    "peak_memory_mb": False,
+}
+CASE_KEYS = ("level", "games", "frames", "engine")
+MIN_TIME_CHANGE = 0.001  # Seconds, phase times that moved less than this are noise however large the ratio
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case):
+    """
+    Run one benchmark case in this process. Must run before anything else imports
+    the simulation, so the horizon override reaches every module.
+
+    :param case: Dict with level, games, frames, engine, generations, seed.
+    :return: Dict of the case and its metrics.
+    """
+    import configs
+    configs.NUM_FRAMES = case["frames"]
+
+    import random
+    from types import SimpleNamespace
+
+    from escape import build_engine
+    from ff import FFInfo
+    from resources import RESOURCES, init_resources
+    from settings import HeadlessEditor
+    from simulation import Simulation
+    from timings import TIMINGS
+
+    random.seed(case["seed"])
+    init_resources(headless=True, level=case["level"])
+    resources = RESOURCES.get()
+
+    # Only the coarse phases, timing every collision check would skew the throughput
+    TIMINGS.enable(["selection", "calc_fitness"])
+
+    # Levels load their distance fields precompiled, so solve them once here to time it
+    ff_start_ts = time.perf_counter()
+    FFInfo.solve(resources.tilemap, resources.lvl_info)
+    ff_solve_s = time.perf_counter() - ff_start_ts
+
+    editor = HeadlessEditor()
+    simulation = Simulation(
+        num_games=case["games"],
+        pop_retention_rate=configs.POP_RETENTION_RATE,
+        pop_expo_percentage=configs.POP_EXPO_PERCENTAGE,
+        num_games_in_row=configs.NUM_GAMES_IN_ROW,
+    )
+    simulation.initialize_population()
+    engine = build_engine(SimpleNamespace(
+        workers=0, engine=case["engine"], level=case["level"],
+        snapshot_interval=configs.SNAPSHOT_INTERVAL, cache_size=configs.GENOME_CACHE_SIZE,
+    ))
+
+    generations = case["generations"]
+    start_ts = time.perf_counter()
+    for _ in range(generations):
+        simulation.run_generation(editor, engine)
+    elapsed = time.perf_counter() - start_ts
+
+    result = dict(case)
+    result.update(
+        frames_per_sec=generations * case["frames"] / elapsed,
+        games_per_sec=generations * case["games"] / elapsed,
+        gens_per_sec=generations / elapsed,
+        peak_memory_mb=peak_memory_mb(),
+        best_fitness=simulation.population.best_fitness,
+        elapsed_s=elapsed,
+        ff_solve_s=ff_solve_s,
+        **{f"{name}_s": total for name, total in TIMINGS.totals.items()},
+    )
+    return result
+
+
+def run_suite(levels, population_sizes, horizons, engine="object", generations=3, seed=0, log=print):
+    """
+    Run every case, each in its own interpreter.
+
+    :return: Report dict with the environment under "meta" and one entry per case under "results".
+    """
+    cases = [
+        dict(level=level, games=games, frames=frames, engine=engine, generations=generations, seed=seed)
+        for level in levels for games in population_sizes for frames in horizons
+    ]
+    results = []
+    for i, case in enumerate(cases, 1):
+        completed = subprocess.run(
+            [sys.executable, "-m", "bench", json.dumps(case)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark case {case} failed:\n{completed.stderr}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        log(f"[{i}/{len(cases)}] {format_case(result)}: {result['frames_per_sec']:.0f} frames/s, "
+            f"{result['games_per_sec']:.0f} games/s, {result['gens_per_sec']:.2f} gen/s, "
+            f"selection {result['selection_s'] * 1000:.1f} ms, peak {result['peak_memory_mb'] or 0:.0f} MB")
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def format_case(result):
+    return f"{result['level']} games={result['games']} frames={result['frames']} engine={result['engine']}"
+
+
+def compare(report, baseline, tolerance):
+    """
+    :param tolerance: Relative change a metric may move in the wrong direction, e.g. 0.1 for 10%.
+    :return: List of (case, metric, baseline value, value, relative change) that regressed.
+    """
+    baseline_results = {tuple(result[key] for key in CASE_KEYS): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = baseline_results.get(tuple(result[key] for key in CASE_KEYS))
+        if old is None:
+            continue
+        for metric, is_higher_better in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            if metric.endswith("_s") and abs(after - before) < MIN_TIME_CHANGE:
+                continue
+            change = (after - before) / before
+            if (-change if is_higher_better else change) > tolerance:
+                regressions.append((format_case(result), metric, before, after, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    # One case in this interpreter, see run_suite
+    print(json.dumps(run_case(json.loads(sys.argv[1]))))
@@ -0,0 +1,75 @@
+"""
+Vectorized breeding stage.
+
+Builds the cumulative fitness table once per generation, draws every parent
+pair in one batch with a binary search (O(n + k log n) instead of a full
+weight table per draw), then does split-point crossover and Bernoulli
+mutation as array operations over the whole offspring matrix. All randomness
+comes from one seedable NumPy Generator.
+"""
+import numpy as np
+
+from configs import MUTATION_PROBABILITY
+
+
+class Breeder:
+    def __init__(self, seed=None, mutation_probability=MUTATION_PROBABILITY):
+        """
+        :param seed: Seed for the random number generator, None for a fresh one.
+        :param mutation_probability: Per-mille chance for each move to be replaced, as in Game.crossover.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.mutation_rate = mutation_probability * 0.001
+
+    def sample_parents(self, weights, num_pairs):
+        """
+        Draw parents with probability proportional to weights.
+
+        :return: Two index arrays (first, second) of length num_pairs.
+        """
+        cum_weights = np.cumsum(np.asarray(weights, dtype=np.float64))
+        draws = self.rng.random((2, num_pairs)) * cum_weights[-1]
+        first, second = np.searchsorted(cum_weights, draws, side="right")
+        # Guard against the draw landing exactly on the total
+        last = len(cum_weights) - 1
+        return np.minimum(first, last), np.minimum(second, last)
+
+    def crossover(self, moves, first, second):
+        """
+        Children take first's moves before a random split point and second's after, then mutate.
+
+        :param moves: Parent move matrix (num_parents, num_moves).
+        :param first: Index of each child's first parent.
+        :param second: Index of each child's second parent.
+        :return: (children, divergence), the child move matrix and, per child, the
+                 first frame whose move differs from its first parent's.
+        """
+        num_children = len(first)
+        num_moves = moves.shape[1]
+        frames = np.arange(num_moves)
+
+        split_points = self.rng.integers(0, num_moves, num_children)
+        first_moves = moves[first]
+        children = np.where(frames < split_points[:, None], first_moves, moves[second])
+
+        is_mutated = self.rng.random(children.shape) < self.mutation_rate
+        mutations = self.rng.integers(0, 4, children.shape, dtype=children.dtype)
+        children = np.where(is_mutated, mutations, children)
+
+        # First changed move before the split point, if any
+        is_changed = (children != first_moves) & (frames < split_points[:, None])
+        divergence = np.where(is_changed.any(axis=1), is_changed.argmax(axis=1), split_points)
+        return children, divergence
+
+    def breed(self, moves, weights, num_children):
+        """
+        :param moves: Parent move matrix, or a list of equally long move lists.
+        :return: (children, first, divergence), see sample_parents and crossover.
+        """
+        moves = np.asarray(moves, dtype=np.uint8)
+        first, second = self.sample_parents(weights, num_children)
+        children, divergence = self.crossover(moves, first, second)
+        return children, first, divergence
+
+    def random_moves(self, num_games, num_moves):
+        return self.rng.integers(0, 4, (num_games, num_moves), dtype=np.uint8)
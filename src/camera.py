@@ -48,7 +48,7 @@ class MouseCam:
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 2:  # Middle mouse button resets the camera
-                    self.offset = self.initial_offset
+                    self.offset = Vector2(self.initial_offset)
                     self.scale = INITIAL_CAMERA_SCALE
             elif event.type == pygame.MOUSEWHEEL:
                 self.wheel_update(Vector2(mouse_pos), event.y, scale_factor)
@@ -106,6 +106,25 @@ class MouseCam:
         self.offset = (self.offset - center) * (new_scale / self.scale) + center
         self.scale = new_scale
 
+    def world_to_screen(self, pos):
+        """
+        :param pos: (x, y) in world pixels, the space games are laid out in.
+        :return: (x, y) in screen pixels.
+        """
+        return pos[0] * self.scale + self.offset.x, pos[1] * self.scale + self.offset.y
+
+    def screen_to_world(self, pos):
+        return (pos[0] - self.offset.x) / self.scale, (pos[1] - self.offset.y) / self.scale
+
+    def visible_rect(self, screen_size):
+        """
+        :param screen_size: Tuple (width, height) of the screen.
+        :return: (left, top, right, bottom) of the world area on screen.
+        """
+        left, top = self.screen_to_world((0, 0))
+        right, bottom = self.screen_to_world(screen_size)
+        return left, top, right, bottom
+
 # Example usage:
 # cam = MouseCam((0, 0), INITIAL_CAMERA_SCALE)
 # while running:
@@ -0,0 +1,186 @@
+"""
+Population checkpoints.
+
+A checkpoint is everything needed to carry on a run exactly where it was at
+the start of a generation: the packed genomes in population order, the
+generation count, both random number generators and the hash of the level the
+genomes were evolved on. Simulation captures one every few generations and
+hands it to a CheckpointWriter, whose thread serializes and writes it while
+the simulation carries on.
+
+Layout, little-endian:
+    header    see _HEADER
+    genomes   num_games * genome size bytes, genome.Genome packing
+    random    Python random state: version (u32), 625 words (u32), gauss_next (f64, NaN for None)
+    breeder   NumPy bit generator state as JSON, empty without a breeder
+"""
+import json
+import math
+import os
+import random
+import struct
+import sys
+import threading
+
+from configs import NUM_FRAMES
+from genome import Genome
+
+MAGIC = b"ESCK"
+CHECKPOINT_VERSION = 1
+
+# Magic, version, generation count, num games, genome length, level sha1, best fitness, best is complete, breeder state size
+_HEADER = struct.Struct("<4sIQII20sd?I")
+_RANDOM_STATE = struct.Struct("<I625Id")
+
+
+class Checkpoint:
+    def __init__(self, generation_count, genomes, level_hash, best_fitness=0.0, best_is_complete=False,
+                 random_state=None, breeder_state=None):
+        """
+        :param genomes: Genomes of the generation in population order, all the same length.
+        :param level_hash: Hex sha1 of the level source, see Resources.level_hash.
+        :param random_state: random.getstate() at the start of the generation.
+        :param breeder_state: The breeder's bit generator state dict, None without a breeder.
+        """
+        self.generation_count = generation_count
+        self.genomes = genomes
+        self.level_hash = level_hash
+        self.best_fitness = best_fitness
+        self.best_is_complete = best_is_complete
+        self.random_state = random_state if random_state is not None else random.getstate()
+        self.breeder_state = breeder_state
+
+    @classmethod
+    def capture(cls, simulation, level_hash):
+        """
+        Take a checkpoint of a simulation. Cheap enough for every generation: genomes
+        are immutable, so this only copies the list of them.
+        """
+        population = simulation.population
+        breeder = population.breeder
+        return cls(
+            simulation.generation_count,
+            [game.moves for game in population.games],
+            level_hash,
+            population.best_fitness,
+            population.best_is_complete,
+            random.getstate(),
+            breeder.rng.bit_generator.state if breeder is not None else None,
+        )
+
+    def to_bytes(self):
+        genome_length = self.genomes[0].length if self.genomes else 0
+        breeder_state = json.dumps(self.breeder_state).encode() if self.breeder_state is not None else b""
+        version, words, gauss_next = self.random_state
+        parts = [
+            _HEADER.pack(MAGIC, CHECKPOINT_VERSION, self.generation_count, len(self.genomes), genome_length,
+                         bytes.fromhex(self.level_hash), self.best_fitness, self.best_is_complete,
+                         len(breeder_state)),
+            b"".join(genome.data for genome in self.genomes),
+            _RANDOM_STATE.pack(version, *words, math.nan if gauss_next is None else gauss_next),
+            breeder_state,
+        ]
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        :raises ValueError: If data is not a checkpoint this version can read.
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Truncated checkpoint")
+        (magic, version, generation_count, num_games, genome_length, level_sha1, best_fitness, best_is_complete,
+         breeder_state_size) = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"Not a version {CHECKPOINT_VERSION} checkpoint")
+
+        genome_size = (genome_length + 3) // 4
+        offset = _HEADER.size
+        genomes_end = offset + num_games * genome_size
+        if len(data) != genomes_end + _RANDOM_STATE.size + breeder_state_size:
+            raise ValueError("Truncated checkpoint")
+        genomes = [Genome(data[i:i + genome_size], genome_length) for i in range(offset, genomes_end, genome_size)]
+
+        random_version, *words, gauss_next = _RANDOM_STATE.unpack_from(data, genomes_end)
+        random_state = (random_version, tuple(words), None if math.isnan(gauss_next) else gauss_next)
+        breeder_state = data[genomes_end + _RANDOM_STATE.size:]
+        return cls(
+            generation_count, genomes, level_sha1.hex(), best_fitness, best_is_complete,
+            random_state, json.loads(breeder_state) if breeder_state else None,
+        )
+
+    def restore(self, simulation, level_hash):
+        """
+        Put a simulation back into the state this checkpoint was captured in.
+
+        :param level_hash: Hash of the loaded level, which has to be the one the genomes were evolved on.
+        :raises ValueError: If the checkpoint belongs to another level or another horizon.
+        """
+        if level_hash != self.level_hash:
+            raise ValueError("Checkpoint was saved on a different level")
+        if self.genomes and self.genomes[0].length != NUM_FRAMES:
+            raise ValueError(f"Checkpoint genomes have {self.genomes[0].length} moves, this build plays {NUM_FRAMES}")
+        simulation.num_games = len(self.genomes)
+        simulation.initialize_population(self.genomes)
+        simulation.generation_count = self.generation_count
+        simulation.frame_count = 0
+        simulation.population.best_fitness = self.best_fitness
+        simulation.population.best_is_complete = self.best_is_complete
+
+        random.setstate(self.random_state)
+        breeder = simulation.population.breeder
+        if breeder is not None and self.breeder_state is not None:
+            breeder.rng.bit_generator.state = self.breeder_state
+
+
+def write_checkpoint(path, checkpoint):
+    """Write then rename, so a crash mid-write leaves the previous checkpoint intact."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(checkpoint.to_bytes())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    with open(path, "rb") as file:
+        return Checkpoint.from_bytes(file.read())
+
+
+class CheckpointWriter:
+    """Writes checkpoints on a background thread. Only the latest one waiting is kept."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.is_closed = False
+        self.num_written = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    def save(self, checkpoint):
+        """Queue a checkpoint and return straight away. Replaces one that is still waiting."""
+        with self.condition:
+            self.pending = checkpoint
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.is_closed:
+                    self.condition.wait()
+                checkpoint, self.pending = self.pending, None
+            if checkpoint is None:
+                return
+            try:
+                write_checkpoint(self.path, checkpoint)
+                self.num_written += 1
+            except OSError as e:
+                print(f"Failed to write checkpoint {self.path}: {e}", file=sys.stderr)
+
+    def close(self):
+        """Finish writing whatever is queued and stop the thread."""
+        with self.condition:
+            self.is_closed = True
+            self.condition.notify()
+        self.thread.join()
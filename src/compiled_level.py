@@ -0,0 +1,296 @@
+"""
+Compiled levels.
+
+A Tiled JSON level compiles into one binary file next to it (lvl1.json ->
+lvl1.lvlc) holding everything startup would otherwise derive from it: the
+tile layers with their item lists, the flood fill distance fields and the
+enemy timeline. Loading maps the file and reads the grids straight out of the
+mapping, so every process that loads the same level shares its pages.
+Worker processes map the file their parent already loaded with attach_level,
+which costs the same on every level: everything that would grow with the
+level (item lists, enemy poses) is only decoded when something asks for it.
+
+The file is rebuilt when the source changes: a matching source mtime and size
+is trusted, otherwise the source's sha1 decides.
+
+Layout, little-endian, every section padded to 4 bytes:
+    header    see _HEADER
+    layers    per layer: name length (u8), name, tile ids (i16 * cells),
+              item count (u32), items as (x, y, tile id) i16 triples
+    fields    FF distance to the key, then to the door (i32 * cells each)
+    masks     walls, then doors (u8 * cells each), 1 where the layer has a tile
+    timeline  enemy x and y (i16 * frames * enemies each), then kind values
+              (f32 * frames * enemies), frame-major
+    hazards   u8 * frames * cells, frame-major, 1 where an enemy is on that frame
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+from configs import NUM_FRAMES
+from enemy import HazardTimeline
+from ff import FFInfo
+from level import GameItem, Tilemap, LevelInfo
+
+MAGIC = b"ESCL"
+COMPILED_LEVEL_VERSION = 2  # Bump when the layout or the meaning of any section changes
+COMPILED_LEVEL_SUFFIX = ".lvlc"
+
+# Magic, version, source mtime_ns, source size, source sha1, num frames, width, height, num layers, num enemies
+_HEADER = struct.Struct("<4sIqQ20sIHHHH")
+
+
+def compiled_path(source_path):
+    return os.path.splitext(source_path)[0] + COMPILED_LEVEL_SUFFIX
+
+
+def _pad(data):
+    data.extend(bytes(-len(data) % 4))
+
+
+def _append_array(data, typecode, values):
+    values = array(typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    data.extend(values.tobytes())
+    _pad(data)
+
+
+def _read_array(view, offset, typecode, count):
+    """
+    :return: (values, offset of the next section). Values are a view into the buffer
+             on little-endian machines and a swapped copy elsewhere.
+    """
+    size = array(typecode).itemsize * count
+    values = view[offset:offset + size].cast(typecode)
+    if sys.byteorder != "little":
+        values = array(typecode, values)
+        values.byteswap()
+    return values, offset + size + (-size % 4)
+
+
+def compile_level(source_path, num_frames=NUM_FRAMES):
+    """
+    Parse a Tiled JSON level and solve everything derived from it.
+
+    :return: The compiled level file contents.
+    """
+    import hashlib
+    import json  # Only needed to compile, loading a compiled level never parses JSON
+
+    with open(source_path, "rb") as file:
+        source = file.read()
+    stat = os.stat(source_path)
+
+    tilemap = Tilemap(json.loads(source))
+    lvl_info = LevelInfo(tilemap)
+    ff_info = FFInfo.solve(tilemap, lvl_info)
+    hazards = HazardTimeline(lvl_info.enemies, lvl_info.spikes, tilemap, num_frames)
+    num_enemies = len(hazards.drawn_enemies)
+
+    data = bytearray(_HEADER.pack(
+        MAGIC, COMPILED_LEVEL_VERSION, stat.st_mtime_ns, stat.st_size, hashlib.sha1(source).digest(),
+        num_frames, tilemap.width, tilemap.height, len(tilemap.tiles), num_enemies,
+    ))
+    _pad(data)
+
+    for name, tiles in tilemap.tiles.items():
+        encoded_name = name.encode()
+        data.append(len(encoded_name))
+        data.extend(encoded_name)
+        _pad(data)
+        _append_array(data, "h", tiles)
+        items = tilemap.get_items(name)
+        data.extend(struct.pack("<I", len(items)))
+        _append_array(data, "h", [value for item in items for value in (*item.pos, item.value)])
+
+    _append_array(data, "i", ff_info.key)
+    _append_array(data, "i", ff_info.door)
+    _append_array(data, "B", tilemap.walls)
+    _append_array(data, "B", tilemap.doors)
+
+    states = [enemy for state in hazards.states[:num_frames] for enemy in state]
+    _append_array(data, "h", [pos[0] for pos, _ in states])
+    _append_array(data, "h", [pos[1] for pos, _ in states])
+    _append_array(data, "f", [value for _, value in states])
+
+    num_cells = tilemap.width * tilemap.height
+    mask = bytearray(num_frames * num_cells)
+    for frame in range(num_frames):
+        for x, y in hazards.cells_at(frame):
+            mask[frame * num_cells + y * tilemap.width + x] = 1
+    _append_array(data, "B", mask)
+    return bytes(data)
+
+
+class _LayerItems(Mapping):
+    """Layer name -> GameItem list, decoded from the (x, y, tile id) triples on first access."""
+
+    def __init__(self, values):
+        """
+        :param values: Layer name -> flat i16 view of its item triples.
+        """
+        self.values = values
+        self.decoded = {}
+
+    def __getitem__(self, name):
+        items = self.decoded.get(name)
+        if items is None:
+            values = self.values[name]
+            items = self.decoded[name] = [GameItem((values[i], values[i + 1]), values[i + 2])
+                                          for i in range(0, len(values), 3)]
+        return items
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class _TimelineStates(Sequence):
+    """HazardTimeline.states read out of the compiled timeline, each frame decoded on first access."""
+
+    def __init__(self, xs, ys, values, num_enemies, num_frames):
+        self.xs = xs
+        self.ys = ys
+        self.values = values
+        self.num_enemies = num_enemies
+        self.num_frames = num_frames
+        self.decoded = {}  # Frame -> state, only frames that were drawn or replayed
+
+    def __getitem__(self, frame):
+        if isinstance(frame, slice):
+            return [self[i] for i in range(*frame.indices(self.num_frames))]
+        if not -self.num_frames <= frame < self.num_frames:
+            raise IndexError("Frame out of range")
+        frame %= self.num_frames
+        state = self.decoded.get(frame)
+        if state is None:
+            start = frame * self.num_enemies
+            end = start + self.num_enemies
+            state = self.decoded[frame] = tuple(zip(zip(self.xs[start:end], self.ys[start:end]), self.values[start:end]))
+        return state
+
+    def __len__(self):
+        return self.num_frames
+
+
+class CompiledLevel:
+    """Everything Resources needs about a level, read from a compiled level file."""
+
+    def __init__(self, buffer, num_frames=NUM_FRAMES, path=None):
+        """
+        :param buffer: Compiled level contents, bytes or an mmap. Grids and fields stay views into it.
+        :param num_frames: Frames the enemy timeline has to cover, more than were compiled get simulated.
+        :param path: Compiled file the buffer maps, None if it is not backed by one.
+        """
+        self.buffer = buffer
+        self.path = path
+        view = memoryview(buffer)
+        (_, _, _, _, sha1, num_compiled_frames, width, height,
+         num_layers, num_enemies) = _HEADER.unpack_from(view)
+        self.level_hash = sha1.hex()
+        num_cells = width * height
+        offset = _HEADER.size + (-_HEADER.size % 4)
+
+        tiles = {}
+        item_values = {}
+        for _ in range(num_layers):
+            name_size = view[offset]
+            name = bytes(view[offset + 1:offset + 1 + name_size]).decode()
+            offset += 1 + name_size + (-(1 + name_size) % 4)
+            tiles[name], offset = _read_array(view, offset, "h", num_cells)
+            num_items, = struct.unpack_from("<I", view, offset)
+            item_values[name], offset = _read_array(view, offset + 4, "h", 3 * num_items)
+
+        key, offset = _read_array(view, offset, "i", num_cells)
+        door, offset = _read_array(view, offset, "i", num_cells)
+        self.ff_info = FFInfo(key, door, width)
+        walls, offset = _read_array(view, offset, "B", num_cells)
+        doors, offset = _read_array(view, offset, "B", num_cells)
+
+        self.tilemap = Tilemap.from_layers(width, height, tiles, _LayerItems(item_values), walls, doors)
+        self.lvl_info = LevelInfo(self.tilemap)
+
+        num_states = num_compiled_frames * num_enemies
+        xs, offset = _read_array(view, offset, "h", num_states)
+        ys, offset = _read_array(view, offset, "h", num_states)
+        values, offset = _read_array(view, offset, "f", num_states)
+        mask, offset = _read_array(view, offset, "B", num_compiled_frames * num_cells)
+        num_frames_used = min(num_compiled_frames, num_frames)
+        states = _TimelineStates(xs, ys, values, num_enemies, num_frames_used)
+        self.hazards = HazardTimeline(self.lvl_info.enemies, self.lvl_info.spikes, self.tilemap, num_frames, states,
+                                      mask[:num_frames_used * num_cells])
+
+
+def is_up_to_date(header, source_path, num_frames=NUM_FRAMES):
+    """Whether a compiled level header still matches its source and the current build."""
+    try:
+        magic, version, mtime_ns, size, sha1, num_compiled_frames, *_ = _HEADER.unpack_from(header)
+    except struct.error:
+        return False
+    if magic != MAGIC or version != COMPILED_LEVEL_VERSION or num_compiled_frames < num_frames:
+        return False
+
+    stat = os.stat(source_path)
+    if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+        return True
+    # Touched but maybe not changed, e.g. by a checkout
+    import hashlib
+
+    with open(source_path, "rb") as file:
+        return hashlib.sha1(file.read()).digest() == sha1
+
+
+def load_level(source_path, num_frames=NUM_FRAMES):
+    """
+    Load a level through its compiled file, compiling it first if it is missing or stale.
+
+    :param source_path: Tiled JSON level.
+    :return: CompiledLevel.
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Map file not found at path: {source_path}")
+    path = compiled_path(source_path)
+
+    try:
+        with open(path, "rb") as file:
+            if is_up_to_date(file.read(_HEADER.size), source_path, num_frames):
+                return _map(file, path, num_frames)
+    except OSError:
+        pass  # Missing or unreadable, compile it
+
+    data = compile_level(source_path, num_frames)
+    try:
+        # Write then rename, so concurrent runs never map a half written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        return CompiledLevel(data, num_frames)  # The compiled file is an optimisation, a read-only checkout still works
+    return CompiledLevel(data, num_frames, path)
+
+
+def attach_level(path, num_frames=NUM_FRAMES):
+    """
+    Map a compiled level another process already loaded with load_level, e.g. in a
+    worker process. Its source is not checked, so this costs the same on every level.
+
+    :param path: CompiledLevel.path of the loaded level.
+    :raises ValueError: If the file is not a compiled level this version can read.
+    """
+    with open(path, "rb") as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header)[:2] != (MAGIC, COMPILED_LEVEL_VERSION):
+            raise ValueError(f"Not a version {COMPILED_LEVEL_VERSION} compiled level: {path}")
+        return _map(file, path, num_frames)
+
+
+def _map(file, path, num_frames):
+    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return CompiledLevel(mapping, num_frames, path)
@@ -13,19 +13,31 @@ POP_RETENTION_RATE = 5.0
 POP_EXPO_PERCENTAGE = 10.0
 
 # Simulation
+TARGET_FPS = 60  # Frame rate the window aims for
+SIM_SPEED = 60  # Updates per second in the window unless frame skip is on, 0 for as many as fit
+UPDATE_BUDGET_SHARE = 0.85  # Share of each frame the window spends on updates, the rest is for drawing
 NUM_FRAMES = 200
 NUM_GAMES_IN_ROW = 35
 NUM_GAMES = 1020
 UNIT_FRAME_SIZE = 8.0
 FRAME_SCALE = 10.0
+LOD_TILE_SIZE = 4.0  # Below this many pixels per tile the game grid draws blocks instead of sprites
+LOD_MAX_BLOCKS = 500  # With more games on screen than this, zoomed out grids draw one pixel per game, scaled up
+HEATMAP_DECAY = 0.98  # Per frame fade of the density heatmap, 1.0 never forgets
+SNAPSHOT_INTERVAL = 20  # Frames between resume snapshots in headless runs, 0 disables them
+GENOME_CACHE_SIZE = 100000  # Outcomes remembered by headless runs, keyed by move sequence
+CHECKPOINT_INTERVAL = 10  # Generations between checkpoints, when they are turned on
+TIMINGS_WINDOW = 60  # Frames the overlay averages phase timings over
+TIMINGS_EXPORT_PATH = "timings.csv"  # Where E writes the recorded timings, .jsonl for JSON lines
 
 # Resources
-TILESET_PATH = "tiled/tileset.png"
+TILESET_PATH = "assets/tileset.png"  # Relative to the repository root
 TILE_SET_NAME = "tileset.png"
+RENDER_CACHE_MAX_SIZE = 4096  # Longest side in pixels of any pre-rendered surface kept between frames
 
 # Levels
-LVL_BACKGROUND_SPRITE = "tiled/lvl2.png"
-LVL_MAP_PATH = "tiled/lvl2.json"
+LVL_MAP_PATH = "assets/lvl1.json"  # Relative to the repository root, used when no level is given
+LAYER_BACKGROUND = "background"
 LAYER_WALLS = "walls"
 LAYER_DOOR = "door"
 LAYER_KEYS = "keys"
@@ -1,34 +1,12 @@
 import pygame
 from pygame.locals import *
+from camera import MouseCam, INITIAL_CAMERA_SCALE
+from settings import Settings
+from simulation import SimulationStats
+from timings import TIMINGS
+from configs import TIMINGS_EXPORT_PATH, TIMINGS_WINDOW
 
-class Settings:
-    def __init__(self):
-        self.is_pause = False
-        self.is_draw = True
-        self.is_restart = False
-        self.is_frame_skip = False
-        self.is_random_ai = False
-        self.is_show_egui = False
-        self.is_ai_enabled = True
-        self.is_show_multiple = False
-        self.slow_mode = False
-class MouseCam:
-    def __init__(self, initial_position, scale):
-        self.position = pygame.Vector2(initial_position)
-        self.scale = scale
-
-    def update(self, mouse_position, dragging):
-        # Placeholder for actual mouse camera logic
-        pass
-
-def mouse_position_local():
-    return pygame.mouse.get_pos()
-class MouseCam:
-    def __init__(self, initial_position, scale):
-        self.position = pygame.Vector2(initial_position)
-        self.scale = scale
-
-        pass
+MAX_SIM_SPEED = 1 << 16  # Updates per second + can go up to
 
 def mouse_position_local():
     return pygame.mouse.get_pos()
@@ -36,15 +14,34 @@ def mouse_position_local():
 class Editor:
     def __init__(self):
         self.settings = Settings()
-        self.mouse_cam = MouseCam((0.25, 0.04), INITIAL_CAMERA_SCALE)
-        # Camera update
-        8*8
-
-    def update(self):
-        # Camera update
-
-
-        self.mouse_cam.update(mouse_position_local(), False)
+        self.mouse_cam = MouseCam((0, 0), INITIAL_CAMERA_SCALE)
+        self.font = None  # Created on first draw, fonts need pygame initialized
+
+    def update(self, events=()):
+        """
+        :param events: This frame's pygame events, the camera zooms on mouse wheel ones.
+        """
+        screen_size = pygame.display.get_surface().get_size()
+        self.mouse_cam.update(mouse_position_local(), False, events, screen_size)
+
+        for event in events:
+            if event.type != KEYDOWN:
+                continue
+            if event.key == K_p:
+                TIMINGS.toggle()
+            elif event.key == K_m:
+                self.settings.is_show_multiple = not self.settings.is_show_multiple
+            elif event.key == K_h:
+                self.settings.is_show_heatmap = not self.settings.is_show_heatmap
+            elif event.key == K_r:
+                self.settings.is_restart = True  # Once per press, each restart saves and replaces the population
+            elif event.key in (K_EQUALS, K_PLUS, K_KP_PLUS):
+                self.settings.sim_speed = min(self.settings.sim_speed * 2, MAX_SIM_SPEED) or 1
+            elif event.key in (K_MINUS, K_KP_MINUS) and self.settings.sim_speed > 1:
+                self.settings.sim_speed //= 2
+            elif event.key == K_e and TIMINGS.buffers:
+                num_frames = TIMINGS.export(TIMINGS_EXPORT_PATH)
+                print(f"Wrote {num_frames} frames of timings to {TIMINGS_EXPORT_PATH}")
 
         # Handle keyboard input
         keys = pygame.key.get_pressed()
@@ -52,8 +49,6 @@ class Editor:
             self.settings.is_pause = not self.settings.is_pause
         if keys[K_TAB]:
             self.settings.is_show_egui = not self.settings.is_show_egui
-        if keys[K_r]:
-            self.settings.is_restart = True
         if keys[K_BACKSPACE]:
             self.settings.slow_mode = not self.settings.slow_mode
         if keys[K_BACKSLASH]:
@@ -61,39 +56,49 @@ class Editor:
         if keys[K_RSHIFT]:
             self.settings.is_frame_skip = not self.settings.is_frame_skip
 
-    def draw(self, stats):
+    def draw(self, stats, fps=0.0, updates_per_sec=0.0):
+        """
+        :param fps: Frame rate of the main loop, from its pygame.time.Clock.
+        :param updates_per_sec: Simulation updates the loop actually achieved.
+        """
         if not self.settings.is_show_egui:
             return
 
         # Draw UI components (basic implementation, you can customize this further)
-        font = pygame.font.Font(None, 24)
+        if self.font is None:
+            self.font = pygame.font.Font(None, 24)  # Loading it is most of the overlay's cost, do it once
+        font = self.font
 
         def draw_text(surface, text, position, color=(255, 255, 255)):
             text_surface = font.render(text, True, color)
             surface.blit(text_surface, position)
 
         screen = pygame.display.get_surface()
-        ui_background = pygame.Surface((220, 240), pygame.SRCALPHA)
+        ui_background = pygame.Surface((220, 300), pygame.SRCALPHA)
         ui_background.fill((30, 30, 30, 220))
-        screen.blit(ui_background, (20, screen.get_height() - 280))
+        screen.blit(ui_background, (20, screen.get_height() - 340))
 
-        y_offset = screen.get_height() - 280 + 10
-        draw_text(screen, f"FPS: {int(pygame.time.Clock().get_fps())}", (30, y_offset))
+        y_offset = screen.get_height() - 340 + 10
+        draw_text(screen, f"FPS: {int(fps)}", (30, y_offset))
+        y_offset += 30
+        sim_speed = "max" if self.settings.is_frame_skip or self.settings.sim_speed <= 0 else self.settings.sim_speed
+        draw_text(screen, f"Updates/s: {updates_per_sec:.0f} ({sim_speed})", (30, y_offset))
         y_offset += 30
-        draw_text(screen, f"Frame: {stats['frame_count']}", (30, y_offset))
+        draw_text(screen, f"Frame: {stats.frame_count}", (30, y_offset))
         y_offset += 30
-        draw_text(screen, f"Gen: {stats['generation_count']}", (30, y_offset))
+        draw_text(screen, f"Gen: {stats.generation_count}", (30, y_offset))
         y_offset += 40
 
         options = [
             ("Draw", self.settings.is_draw),
             ("Slow Mode", self.settings.slow_mode),
             ("Show Multi", self.settings.is_show_multiple),
+            ("Heatmap", self.settings.is_show_heatmap),
             ("Enable AI", self.settings.is_ai_enabled),
             ("Frame skip", self.settings.is_frame_skip),
         ]
 
-        for label, value in options:#sdfadsadasadasd
+        for label, value in options:
             draw_text(screen, f"{label}: {'On' if value else 'Off'}", (30, y_offset))
             y_offset += 30
 
@@ -104,16 +109,37 @@ class Editor:
         for label, value in controls:
             draw_text(screen, f"{label}: {'On' if value else 'Off'}", (30, y_offset))
             y_offset += 30
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-sadasdasdasdasdzx = 245165
-dasds
-INITIAL_CAMERA_SCALE = sadadasdassdasdasdasdzx
+
+        if TIMINGS.buffers:
+            self.draw_timings(screen, font)
+
+    @staticmethod
+    def draw_timings(screen, font, width=340, row_height=22, sparkline_width=80):
+        """Per-phase milliseconds averaged over the last TIMINGS_WINDOW frames, each with a sparkline of its history."""
+        height = (len(TIMINGS.buffers) + 1) * row_height + 10
+        left = 260
+        top = screen.get_height() - 40 - height
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((30, 30, 30, 220))
+        screen.blit(panel, (left, top))
+
+        status = "" if TIMINGS.is_enabled else " (paused)"
+        screen.blit(font.render(f"ms / frame{status}", True, (255, 255, 255)), (left + 10, top + 5))
+        for i, (name, buffer) in enumerate(TIMINGS.buffers.items(), 1):
+            y = top + 5 + i * row_height
+            history = buffer.to_list()
+            recent = history[-TIMINGS_WINDOW:]
+            mean = sum(recent) / len(recent) if recent else 0.0
+            screen.blit(font.render(f"{name}: {mean:.2f}", True, (220, 220, 220)), (left + 10, y))
+
+            if len(history) > 1:
+                peak = max(history) or 1.0
+                spark_left = left + width - sparkline_width - 10
+                step = sparkline_width / (len(history) - 1)
+                points = [(spark_left + j * step, y + row_height - 6 - value / peak * (row_height - 8))
+                          for j, value in enumerate(history)]
+                pygame.draw.lines(screen, (116, 242, 145), False, points)
+
 if __name__ == "__main__":
     pygame.init()
     screen = pygame.display.set_mode((800, 600))
@@ -121,20 +147,21 @@ if __name__ == "__main__":
     clock = pygame.time.Clock()
 
     editor = Editor()
-    stats = {"frame_count": 0, "generation_count": 0}
+    stats = SimulationStats(0, 0)
 
     running = True
     while running:
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        for event in events:
             if event.type == QUIT:
                 running = False
 
-        editor.update()
+        editor.update(events)
 
-        stats["frame_count"] += 1
+        stats.frame_count += 1
 
         screen.fill((0, 0, 0))
-        editor.draw(stats)
+        editor.draw(stats, clock.get_fps())
 
         pygame.display.flip()
         clock.tick(60)
@@ -1,11 +1,13 @@
-import math
-from typing import List, Tuple
+from typing import List, Tuple, TYPE_CHECKING
 
-from pygame import Surface, draw, transform
+if TYPE_CHECKING:
+    from pygame import Surface  # Only for annotations, the simulation never imports pygame
 
 class EnemyKind:
     """Represents the type of enemy: Spike or Crab."""
 
+    __slots__ = ("kind", "value")
+
     def __init__(self, kind: str, value: float = 0.0):
         self.kind = kind  # "Spike" or "Crab"
         self.value = value  # Angle for Spike, Direction (bool) for Crab
@@ -13,6 +15,8 @@ class EnemyKind:
 class GameItem:
     """Game item structure with position and value."""
 
+    __slots__ = ("pos", "value")
+
     def __init__(self, pos: Tuple[int, int], value: int):
         self.pos = pos
         self.value = value
@@ -20,12 +24,14 @@ class GameItem:
 class Enemy:
     """Represents a single enemy in the game."""
 
+    __slots__ = ("pos", "kind", "item")
+
     def __init__(self, pos: Tuple[int, int], kind: EnemyKind, item: GameItem):
         self.pos = pos
         self.kind = kind
         self.item = item
 
-    def update(self, agent_pos: Tuple[int, int], walls_layer) -> bool:
+    def update(self, agent_pos: Tuple[int, int], tilemap) -> bool:
         """Updates the enemy's position and checks for collisions with the agent."""
         agent_x, agent_y = agent_pos
 
@@ -34,13 +40,13 @@ class Enemy:
 
             if self.item.value == 88:  # Vertical movement
                 new_y = self.pos[1] + 1 if direction else self.pos[1] - 1
-                if walls_layer[self.pos[0]][new_y]:
+                if tilemap.is_wall(self.pos[0], new_y):
                     self.kind.value = not direction
                     new_y = self.pos[1] - 2 if direction else self.pos[1] + 2
                 self.pos = (self.pos[0], new_y)
             else:  # Horizontal movement
                 new_x = self.pos[0] - 1 if direction else self.pos[0] + 1
-                if walls_layer[new_x][self.pos[1]]:
+                if tilemap.is_wall(new_x, self.pos[1]):
                     self.kind.value = not direction
                     new_x = self.pos[0] + 2 if direction else self.pos[0] - 2
                 self.pos = (new_x, self.pos[1])
@@ -51,36 +57,44 @@ class Enemy:
         # Check collision with agent
         return self.pos == (agent_x, agent_y)
 
-    def draw(self, surface: Surface, textures: dict, scale_factor: float, offset_x: float, offset_y: float):
-        """Renders the enemy on the screen."""
+    def draw(self, surface: "Surface", sprites, scale_factor: float, offset_x: float, offset_y: float):
+        """
+        Renders the enemy on the screen.
+
+        :param sprites: sprites.RotatedSpriteCache to take the rotated texture from.
+        """
         if self.kind.kind == "Spike":
             texture_key = {
-                101: "small_spike_texture",
-                104: "large_spike_texture"
+                101: "small_spike",
+                104: "large_spike"
             }.get(self.item.value, None)
         else:
-            texture_key = "crab_texture"
+            texture_key = "crab"
 
         if not texture_key:
             return  # Blank spike, do not render
 
-        texture = textures[texture_key]
-        render_scale = 2.0 if texture_key == "large_spike_texture" else 1.0
+        render_scale = 2.0 if texture_key == "large_spike" else 1.0
 
         rotation = 0.0
         if self.kind.kind == "Spike":
-            rotation = math.radians(self.kind.value)
+            rotation = self.kind.value
         elif self.kind.kind == "Crab":
             if self.item.value == 88:
-                rotation = math.pi if self.kind.value else 0.0
+                rotation = 180.0 if self.kind.value else 0.0
             else:
-                rotation = math.pi + math.pi / 2.0 if self.kind.value else math.pi / 2.0
-
-        transformed_texture = transform.rotozoom(texture, -math.degrees(rotation), render_scale * scale_factor)
-        surface.blit(transformed_texture, (
-            self.pos[0] * scale_factor + offset_x,
-            self.pos[1] * scale_factor + offset_y
-        ))
+                rotation = 270.0 if self.kind.value else 90.0
+
+        # Rotated sprites grow, so keep them centred on the area the enemy covers
+        half_size = render_scale * scale_factor / 2.0
+        center = (self.pos[0] * scale_factor + offset_x + half_size, self.pos[1] * scale_factor + offset_y + half_size)
+        # Rotated, a sprite reaches at most sqrt(2) half sizes from its centre; off screen it is never rendered
+        reach = half_size * 1.5
+        if (center[0] + reach < 0 or center[0] - reach > surface.get_width()
+                or center[1] + reach < 0 or center[1] - reach > surface.get_height()):
+            return
+        sprite = sprites.get(texture_key, rotation, scale_factor)
+        surface.blit(sprite, sprite.get_rect(center=center))
 
 class EnemyManager:
     """Manages all enemies and spikes in the game."""
@@ -89,22 +103,93 @@ class EnemyManager:
         self.enemies = [Enemy(e.pos, EnemyKind("Crab", False), e) for e in enemies]
         self.spikes = [Enemy(s.pos, EnemyKind("Spike", 0.0), s) for s in spikes]
 
-    def update(self, agent_pos: Tuple[int, int], walls_layer) -> bool:
+    def update(self, agent_pos: Tuple[int, int], tilemap) -> bool:
         """Updates all enemies and checks for collisions with the agent."""
         for enemy in self.enemies:
-            if enemy.update(agent_pos, walls_layer):
+            if enemy.update(agent_pos, tilemap):
                 return True
 
         for spike in self.spikes:
-            if spike.update(agent_pos, walls_layer):
+            if spike.update(agent_pos, tilemap):
                 return True
 
         return False
 
-    def draw(self, surface: Surface, textures: dict, scale_factor: float, offset_x: float, offset_y: float):
+    def draw(self, surface: "Surface", sprites, scale_factor: float, offset_x: float, offset_y: float):
         """Renders all enemies and spikes on the screen."""
         for enemy in self.enemies:
-            enemy.draw(surface, textures, scale_factor, offset_x, offset_y)
+            enemy.draw(surface, sprites, scale_factor, offset_x, offset_y)
 
         for spike in self.spikes:
-            spike.draw(surface, textures, scale_factor, offset_x, offset_y)
+            spike.draw(surface, sprites, scale_factor, offset_x, offset_y)
+
+
+class HazardTimeline:
+    """
+    Enemy positions for every frame of a level, simulated once and shared by all games.
+
+    Crabs and spikes never react to the agent, so whether a cell is deadly
+    depends only on the frame. Frame f holds the state after the enemies'
+    (f + 1)-th update, which is what Game.update sees on frame f.
+    """
+
+    def __init__(self, enemies: List[GameItem], spikes: List[GameItem], tilemap, num_frames: int, states=None,
+                 mask=None):
+        """
+        :param states: Frames already simulated, as in self.states, e.g. read from a compiled level.
+        :param mask: Deadly cells of those frames, frame-major bytes of width * height each, nonzero
+                     where an enemy is. Answers is_deadly without building a set per frame.
+        """
+        self.enemy_manager = EnemyManager(enemies, spikes)
+        self.tilemap = tilemap
+        # Separate objects to pose for drawing, so drawing never disturbs the simulation
+        self.drawn_enemies = [Enemy(e.pos, EnemyKind(e.kind.kind, e.kind.value), e.item)
+                        for e in self.enemy_manager.enemies + self.enemy_manager.spikes]
+        # Frame -> (pos, kind value) per enemy, for drawing. Given states stay as they are until extended
+        self.states = states if states is not None else []
+        self.cells: List[frozenset] = []  # Frame -> deadly (x, y) cells, built from states on demand
+        self.mask = mask
+        self.width = tilemap.width
+        self.frame_size = tilemap.width * tilemap.height
+        self.num_mask_frames = len(mask) // self.frame_size if mask is not None else 0
+        self.num_simulated = 0  # Frames enemy_manager has been updated for
+        self.extend(num_frames)
+
+    def extend(self, num_frames: int):
+        """Simulates further frames until the timeline covers num_frames."""
+        if len(self.states) >= num_frames:
+            return
+
+        nowhere = (-1, -1)
+        everyone = self.enemy_manager.enemies + self.enemy_manager.spikes
+        self.states = list(self.states)
+        # Frames that were given rather than simulated still have to be replayed to carry on from them
+        while self.num_simulated < len(self.states):
+            self.enemy_manager.update(nowhere, self.tilemap)
+            self.num_simulated += 1
+
+        while len(self.states) < num_frames:
+            self.enemy_manager.update(nowhere, self.tilemap)
+            self.num_simulated += 1
+            self.states.append(tuple((enemy.pos, enemy.kind.value) for enemy in everyone))
+
+    def cells_at(self, frame: int) -> frozenset:
+        if frame >= len(self.states):
+            self.extend(frame + 1)
+        while len(self.cells) <= frame:
+            self.cells.append(frozenset(pos for pos, _ in self.states[len(self.cells)]))
+        return self.cells[frame]
+
+    def is_deadly(self, frame: int, pos: Tuple[int, int]) -> bool:
+        if frame < self.num_mask_frames:
+            return self.mask[frame * self.frame_size + pos[1] * self.width + pos[0]] != 0
+        return pos in self.cells_at(frame)
+
+    def draw(self, frame: int, surface: "Surface", sprites, scale_factor: float, offset_x: float, offset_y: float):
+        """Renders every enemy as it is on the given frame."""
+        if frame >= len(self.states):
+            self.extend(frame + 1)
+        for enemy, (pos, value) in zip(self.drawn_enemies, self.states[frame]):
+            enemy.pos = pos
+            enemy.kind.value = value
+            enemy.draw(surface, sprites, scale_factor, offset_x, offset_y)
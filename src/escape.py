@@ -0,0 +1,289 @@
+"""
+Command line entry point.
+
+Run from the ``src`` directory:
+
+    python -m escape train --generations 100
+
+``train`` runs the genetic algorithm headless: no display, no event pump and
+no frame cap, so the simulation runs as fast as the CPU allows.
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+from configs import NUM_GAMES, NUM_GAMES_IN_ROW, POP_RETENTION_RATE, POP_EXPO_PERCENTAGE, NUM_FRAMES, GENOME_CACHE_SIZE
+from configs import SNAPSHOT_INTERVAL, CHECKPOINT_INTERVAL
+from bench import LEVELS as BENCH_LEVELS, POPULATION_SIZES as BENCH_POPULATION_SIZES, HORIZONS as BENCH_HORIZONS
+from game import ObjectEngine
+from genome_cache import GenomeCache, CachedEngine
+from resources import REPOSITORY_ROOT, init_resources, level_path
+from settings import HeadlessEditor
+from simulation import Simulation
+from timings import TIMINGS
+
+
+def build_engine(args):
+    """
+    Engine a headless run evaluates each generation with.
+
+    :return: An object with evaluate(games).
+    """
+    if args.workers:
+        from parallel import ParallelEvaluator
+        engine = ParallelEvaluator(args.workers, args.engine, args.level)
+    elif args.engine == "batch":
+        from batch import BatchEngine  # Needs NumPy, only import it when asked for
+        engine = BatchEngine()
+    else:
+        engine = ObjectEngine(snapshot_interval=args.snapshot_interval)
+
+    if args.cache_size:
+        engine = CachedEngine(engine, GenomeCache(args.cache_size))
+    return engine
+
+
+def train(args):
+    """
+    Run the simulation headless and report generations/sec.
+
+    :param args: Parsed command line arguments.
+    """
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    init_resources(headless=True, level=args.level)
+
+    breeder = None
+    if args.breeder == "numpy":
+        from breeding import Breeder
+        breeder = Breeder(args.seed)
+
+    editor = HeadlessEditor()
+    editor.settings.is_random_ai = args.random_ai
+    simulation = Simulation(
+        num_games=args.games,
+        pop_retention_rate=args.retention,
+        pop_expo_percentage=args.exploration,
+        num_games_in_row=NUM_GAMES_IN_ROW,
+        breeder=breeder,
+    )
+    if args.resume:
+        try:
+            simulation.resume(args.resume)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Cannot resume from {args.resume}: {e}")
+        print(f"Resumed generation {simulation.generation_count} of {simulation.num_games} games from {args.resume}")
+    else:
+        simulation.initialize_population()
+    checkpoint_path = args.checkpoint or args.resume
+    if checkpoint_path:
+        simulation.enable_checkpoints(checkpoint_path, args.checkpoint_every)
+
+    engine = build_engine(args)
+    if args.timings:
+        TIMINGS.enable(draw=False)
+
+    start_ts = time.perf_counter()
+    report_ts = start_ts
+    report_generation = simulation.generation_count
+    last_generation = simulation.generation_count + args.generations
+
+    while simulation.generation_count < last_generation:
+        simulation.run_generation(editor, engine)
+        TIMINGS.end_frame()  # One row per generation
+
+        num_done = simulation.generation_count - report_generation
+        if num_done >= args.report_every or simulation.generation_count == last_generation:
+            now = time.perf_counter()
+            elapsed = now - report_ts
+            cache_info = ""
+            if isinstance(engine, CachedEngine):
+                cache_info = (f", cache hits: {engine.last_hits}/{engine.last_hits + engine.last_misses} "
+                              f"(total {engine.cache.hit_rate():.0%})")
+            # Share of game frames of the last generation that actually had to be simulated
+            active_info = ""
+            active_counts = getattr(getattr(engine, "engine", engine), "active_counts", None)
+            if active_counts is not None:
+                active_info = f", simulated: {sum(active_counts) / (simulation.num_games * NUM_FRAMES):.0%}"
+            print(f"Gen: {simulation.generation_count - 1}, "
+                  f"best fitness: {simulation.population.best_fitness:.2f}, "
+                  f"{num_done / elapsed:.2f} gen/s, "
+                  f"{num_done * NUM_FRAMES / elapsed:.0f} frames/s{cache_info}{active_info}")
+            report_ts = now
+            report_generation = simulation.generation_count
+
+    elapsed = time.perf_counter() - start_ts
+    simulation.close()
+    if hasattr(engine, "close"):
+        engine.close()
+    print(f"Trained {args.generations} generations of {simulation.num_games} games in {elapsed:.2f}s "
+          f"({args.generations / elapsed:.2f} gen/s)")
+    if args.timings:
+        TIMINGS.disable()
+        print(f"Wrote {TIMINGS.export(args.timings)} generations of phase timings to {args.timings}")
+
+
+def islands(args):
+    """
+    Run several populations in parallel processes with periodic migration.
+
+    :param args: Parsed command line arguments.
+    """
+    from islands import IslandConfig, run_islands
+
+    def rates(text, default):
+        if text is None:
+            # Spread the islands around the configured rate
+            return [default, default / 2.0, default * 2.0]
+        return [float(value) for value in text.split(",")]
+
+    retention_rates = rates(args.retention, POP_RETENTION_RATE)
+    exploration_rates = rates(args.exploration, POP_EXPO_PERCENTAGE)
+    configs = [
+        IslandConfig(
+            island_id=i,
+            num_games=args.games,
+            pop_retention_rate=retention_rates[i % len(retention_rates)],
+            pop_expo_percentage=exploration_rates[i % len(exploration_rates)],
+            seed=None if args.seed is None else args.seed + i,
+        )
+        for i in range(args.islands)
+    ]
+    run_islands(configs, args.generations, args.migration_interval, args.migrants, args.engine, args.until_solved,
+                args.level)
+
+
+def compile_levels(args):
+    """
+    Compile levels ahead of time, so no run has to parse their JSON.
+
+    :param args: Parsed command line arguments.
+    """
+    from compiled_level import compiled_path, load_level
+
+    paths = [level_path(level) for level in args.levels]
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(REPOSITORY_ROOT, "assets", "lvl*.json")))
+    for path in paths:
+        load_level(path)
+        print(f"{os.path.relpath(path)} -> {os.path.relpath(compiled_path(path))}")
+
+
+def bench(args):
+    """
+    Run the benchmark suite, write it as JSON and compare it against a baseline.
+
+    :param args: Parsed command line arguments.
+    :return: Exit status, 1 if anything regressed against the baseline.
+    """
+    import json
+    from bench import compare, run_suite
+
+    def values(text, convert=str):
+        return [convert(value) for value in text.split(",")]
+
+    report = run_suite(values(args.levels), values(args.games, int), values(args.frames, int),
+                       args.engine, args.generations, args.seed)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance)
+        for case, metric, before, after, change in regressions:
+            print(f"REGRESSION {case} {metric}: {before:.4g} -> {after:.4g} ({change:+.0%})")
+        print(f"{len(regressions)} regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="escape", description="Escape the room genetic algorithm.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser("train", help="Run the simulation headless as fast as possible.")
+    train_parser.add_argument("--level", default=None, help="Level name (e.g. lvl2) or path to a Tiled JSON level.")
+    train_parser.add_argument("--generations", type=int, default=100, help="Number of generations to run.")
+    train_parser.add_argument("--games", type=int, default=NUM_GAMES, help="Population size.")
+    train_parser.add_argument("--retention", type=float, default=POP_RETENTION_RATE,
+                              help="Percentage of the best games kept as-is each generation.")
+    train_parser.add_argument("--exploration", type=float, default=POP_EXPO_PERCENTAGE,
+                              help="Percentage of fresh random games each generation.")
+    train_parser.add_argument("--engine", choices=["object", "batch"], default="object",
+                              help="object: Game.update per game, batch: NumPy struct-of-arrays engine.")
+    train_parser.add_argument("--breeder", choices=["python", "numpy"], default="python",
+                              help="numpy: draw all parents and build all children as array operations.")
+    train_parser.add_argument("--workers", type=int, default=0,
+                              help="Evaluate each generation across this many processes (0: in-process).")
+    train_parser.add_argument("--cache-size", type=int, default=GENOME_CACHE_SIZE,
+                              help="Remember the outcome of this many genomes to skip re-simulating them (0: off).")
+    train_parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL,
+                              help="Object engine: frames between snapshots children resume from (0: off).")
+    train_parser.add_argument("--random-ai", action="store_true", help="Restart with a random population every generation.")
+    train_parser.add_argument("--report-every", type=int, default=10, help="Print throughput every N generations.")
+    train_parser.add_argument("--seed", type=int, default=None, help="Seed the random number generator.")
+    train_parser.add_argument("--checkpoint", default=None,
+                              help="Save the population here every --checkpoint-every generations and at the end.")
+    train_parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_INTERVAL,
+                              help="Generations between checkpoints.")
+    train_parser.add_argument("--resume", default=None,
+                              help="Carry on from this checkpoint (population size comes from it), "
+                                   "and keep checkpointing to it unless --checkpoint is given.")
+    train_parser.add_argument("--timings", default=None,
+                              help="Time each phase per generation and write them here (.csv or .jsonl).")
+    train_parser.set_defaults(func=train)
+
+    islands_parser = commands.add_parser("islands", help="Island model: one population per process, with migration.")
+    islands_parser.add_argument("--level", default=None, help="Level name (e.g. lvl2) or path to a Tiled JSON level.")
+    islands_parser.add_argument("--islands", type=int, default=os.cpu_count() or 1, help="Number of islands.")
+    islands_parser.add_argument("--generations", type=int, default=100, help="Generations per island.")
+    islands_parser.add_argument("--games", type=int, default=NUM_GAMES, help="Population size of each island.")
+    islands_parser.add_argument("--retention", default=None,
+                                help="Comma separated retention rates, assigned to islands in turn.")
+    islands_parser.add_argument("--exploration", default=None,
+                                help="Comma separated exploration rates, assigned to islands in turn.")
+    islands_parser.add_argument("--migration-interval", type=int, default=10,
+                                help="Exchange top genomes every N generations.")
+    islands_parser.add_argument("--migrants", type=int, default=5, help="Genomes each island sends per exchange.")
+    islands_parser.add_argument("--engine", choices=["object", "batch"], default="object",
+                                help="Engine each island evaluates with.")
+    islands_parser.add_argument("--until-solved", action="store_true", help="Stop once any island completes the level.")
+    islands_parser.add_argument("--seed", type=int, default=None, help="Island i is seeded with seed + i.")
+    islands_parser.set_defaults(func=islands)
+
+    compile_parser = commands.add_parser("compile", help="Compile levels to their binary form ahead of time.")
+    compile_parser.add_argument("levels", nargs="*", help="Level names or paths, all of assets/lvl*.json by default.")
+    compile_parser.set_defaults(func=compile_levels)
+
+    bench_parser = commands.add_parser("bench", help="Benchmark levels, population sizes and horizons.")
+    bench_parser.add_argument("--levels", default=",".join(BENCH_LEVELS), help="Comma separated level names.")
+    bench_parser.add_argument("--games", default=",".join(map(str, BENCH_POPULATION_SIZES)),
+                              help="Comma separated population sizes.")
+    bench_parser.add_argument("--frames", default=",".join(map(str, BENCH_HORIZONS)),
+                              help="Comma separated horizons, each run with NUM_FRAMES set to it.")
+    bench_parser.add_argument("--engine", choices=["object", "batch"], default="object", help="Engine to benchmark.")
+    bench_parser.add_argument("--generations", type=int, default=3, help="Generations per case.")
+    bench_parser.add_argument("--seed", type=int, default=0, help="Seed every case with this.")
+    bench_parser.add_argument("--output", default="benchmark.json", help="Write the results here as JSON ('' to skip).")
+    bench_parser.add_argument("--compare", default=None, help="Baseline JSON to flag regressions against.")
+    bench_parser.add_argument("--tolerance", type=float, default=0.1,
+                              help="Relative slowdown or growth of a metric that counts as a regression.")
+    bench_parser.set_defaults(func=bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
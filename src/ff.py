@@ -1,75 +1,68 @@
-from resources import RESOURCES
+from array import array
+from collections import deque
+
 
 class FF:
-    def __init__(self, start_pos, size):
+    def __init__(self, start_pos, tilemap):
         """
         Initialize a flood fill (FF) solver.
 
         :param start_pos: Tuple (x, y) for the starting position.
-        :param size: Tuple (width, height) for grid bounds.
+        :param tilemap: level.Tilemap with the walls to flood around.
         """
-        self.q = []  # Queue for flood fill algorithm
-        self.mat = {}  # Dictionary to store weights
-        self.weight = 0
         self.start_pos = start_pos
-        self.grid_bounds = size
-
-    def update_q(self, pos):
-        """
-        Add a position to the queue if it meets all constraints.
-
-        :param pos: Tuple (x, y) of the position to check.
-        """
-        x, y = pos
-
-        # Check if position is already in queue, out of bounds, or invalid
-        if pos in self.q:
-            return
-
-        if x >= self.grid_bounds[0] or y >= self.grid_bounds[1]:
-            return
-
-        if RESOURCES is None:
-            raise RuntimeError("RESOURCES is not initialized. Please call init_resources() before using FF.")
-
-        # Safely access RESOURCES
-        resources = RESOURCES.get()
-        tile = resources.lvl_map.get_tile("LAYER_WALLS", x, y)
-        if tile is not None:
-            return
-
-        if pos in self.mat:
-            return
-
-        self.q.append(pos)
-
-    def process(self):
-        """
-        Process the flood fill queue, updating weights for each accessible tile.
-        """
-        while self.q:
-            x, y = self.q.pop(0)  # Dequeue
-
-            self.weight += 1
-            self.mat[(x, y)] = self.weight
-
-            self.update_q((x + 1, y))
-            self.update_q((x - 1, y))
-            self.update_q((x, y + 1))
-            self.update_q((x, y - 1))
+        self.tilemap = tilemap
 
     def solve(self):
         """
-        Perform flood fill and return the resulting weight matrix.
+        Breadth first search from the start position over every non-wall cell.
 
-        :return: Dictionary of positions to weights.
+        :return: Row-major array of width * height ints. The start cell is 1, each
+                 step away adds 1 and unreachable cells are 0.
         """
-        self.q.append(self.start_pos)
-        self.process()
-        return self.mat.copy()
-
-# Example usage
-# Initialize with starting position and grid size
-# ff = FF((0, 0), (10, 10))
-# result = ff.solve()
-# print(result)
+        width, height = self.tilemap.size
+        num_cells = width * height
+        walls = self.tilemap.walls
+
+        dist = array("i", bytes(4 * num_cells))
+        start = self.start_pos[1] * width + self.start_pos[0]
+        dist[start] = 1
+        q = deque([start])
+
+        while q:
+            i = q.popleft()
+            weight = dist[i] + 1
+            x = i % width
+            neighbours = (
+                (i + 1, x + 1 < width),
+                (i - 1, x > 0),
+                (i + width, i + width < num_cells),
+                (i - width, i >= width),
+            )
+            for j, is_inside in neighbours:
+                if is_inside and not walls[j] and not dist[j]:
+                    dist[j] = weight
+                    q.append(j)
+
+        return dist
+
+
+class FFInfo:
+    """Distance fields to the key and to the door, indexed as field[y * width + x]."""
+
+    def __init__(self, key, door, width):
+        self.key = key
+        self.door = door
+        self.width = width
+
+    @classmethod
+    def solve(cls, tilemap, lvl_info):
+        key = FF(lvl_info.key, tilemap).solve()
+        door = FF(lvl_info.door, tilemap).solve()
+        return cls(key, door, tilemap.width)
+
+    def key_at(self, pos):
+        return self.key[pos[1] * self.width + pos[0]]
+
+    def door_at(self, pos):
+        return self.door[pos[1] * self.width + pos[0]]
@@ -0,0 +1,70 @@
+"""
+Population scoring from per-level lookup tables.
+
+Game.fitness_score splits into a part that depends only on where the agent
+stands and whether it holds the key, and step-count terms. FitnessTable
+precomputes the first part for every cell of the level, indexed as
+distance[key_state, y, x], so scoring a population is one gather plus a few
+array operations over its step counts, normalization included.
+
+Every term is computed in the same order Game.fitness_score uses, so the
+results are bit-identical to scoring game by game.
+"""
+import numpy as np
+
+from configs import NUM_FRAMES, FF_WEIGHT_THRESHOLD
+
+
+class FitnessTable:
+    def __init__(self, ff_info, size, num_frames=NUM_FRAMES):
+        """
+        :param ff_info: ff.FFInfo of the level.
+        :param size: (width, height) of the level.
+        :param num_frames: Horizon the step counts are measured against.
+        """
+        width, height = size
+        key = np.asarray(ff_info.key, dtype=np.float64).reshape(height, width)
+        door = np.asarray(ff_info.door, dtype=np.float64).reshape(height, width)
+        self.num_frames = num_frames
+        # Unreachable cells are 0 in the fields and come out as inf, no agent ever stands on one
+        with np.errstate(divide="ignore"):
+            self.distance = np.stack([1.0 / key * 1000.0, 1.0 / door * 1000.0])
+        self.distance.flags.writeable = False
+
+    def score(self, x, y, is_key_collected, is_complete, num_key_steps, num_door_steps):
+        """
+        Fitness of every game, same as Game.fitness_score. All arguments are arrays with one entry per game.
+
+        :return: Float64 array of fitness.
+        """
+        num_frames = self.num_frames
+        distance = self.distance[is_key_collected.astype(np.intp), y, x]
+        # Games that have not collected the key leave num_key_steps at 0, their quotient is discarded
+        with np.errstate(divide="ignore"):
+            carrying = distance + (10.0 + num_frames / num_key_steps) + 1000.0
+        complete = ((num_frames - num_key_steps + 1.0) * 20.0 + (num_frames - num_door_steps + 1.0) * 20.0
+                    + FF_WEIGHT_THRESHOLD * 2.0)
+        return np.where(is_complete, complete, np.where(is_key_collected, carrying, distance))
+
+    def score_games(self, games):
+        """
+        Score games and store each one's fitness on it, as Game.fitness_score does.
+
+        :return: Selection weights: the fitness scaled so the best game is 100, unscaled if none is above 0.
+        """
+        # One flat list converts to an array faster than a list of per-game tuples
+        columns = np.array([
+            value for game in games
+            for value in (*game.agent.pos, game.is_key_collected, game.is_complete, game.num_key_steps, game.num_door_steps)
+        ], dtype=np.int64).reshape(-1, 6).T
+        x, y, is_key_collected, is_complete, num_key_steps, num_door_steps = columns
+        fitness = self.score(x, y, is_key_collected.astype(bool), is_complete.astype(bool),
+                             num_key_steps, num_door_steps)
+
+        for game, value in zip(games, fitness.tolist()):
+            game.fitness = value
+
+        max_fitness = fitness.max(initial=0.0)
+        if max_fitness > 0:
+            fitness = fitness / max_fitness * 100.0
+        return fitness.tolist()
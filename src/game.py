@@ -1,14 +1,60 @@
-import pygame
 import random
-from resources import RESOURCES, TEXTURES
+import itertools
+from collections import namedtuple
+from resources import RESOURCES
 from agent import Agent, AgentCommand
-from enemy import EnemyManager
-from configs import NUM_FRAMES
+from genome import Genome
+from configs import NUM_FRAMES, SNAPSHOT_INTERVAL
 from configs import FF_WEIGHT_THRESHOLD, MUTATION_PROBABILITY, UNIT_FRAME_SIZE, FRAME_SCALE
 
+# Everything about a finished game that fitness depends on
+Outcome = namedtuple("Outcome", [
+    "pos", "is_key_collected", "is_complete", "is_dead", "num_key_steps", "num_door_steps",
+])
+
+class ObjectEngine:
+    """Evaluates games one at a time with Game.update, the reference every other engine matches."""
+
+    def __init__(self, num_frames=NUM_FRAMES, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        :param num_frames: Number of frames simulated per generation.
+        :param snapshot_interval: Record a snapshot every this many frames so children
+                                  can resume from them, 0 to turn snapshots off.
+        """
+        self.num_frames = num_frames
+        self.snapshot_interval = snapshot_interval
+        self.active_counts = []  # Games simulated on each frame of the last evaluate call
+
+    def evaluate(self, games):
+        interval = self.snapshot_interval
+        # +1 where a game starts being simulated, -1 where it stops
+        active_deltas = [0] * (self.num_frames + 1)
+        for game in games:
+            start_frame = game.resume()
+            end_frame = self.num_frames
+            for frame_count in range(start_frame, self.num_frames):
+                if game.is_dead or game.is_complete:
+                    end_frame = frame_count
+                    break
+                if interval and frame_count % interval == 0 and frame_count > start_frame:
+                    game.snapshots.append((frame_count, game.outcome()))
+                game.update(frame_count)
+            active_deltas[start_frame] += 1
+            active_deltas[end_frame] -= 1
+
+        self.active_counts = list(itertools.accumulate(active_deltas[:self.num_frames]))
+
 class Game:
-    def __init__(self):
-        resources = RESOURCES
+    __slots__ = (
+        "lvl", "fitness", "is_key_collected", "is_complete", "is_dead", "agent", "moves", "hazards",
+        "frame_count", "num_key_steps", "num_door_steps", "snapshots", "parent", "divergence",
+    )
+
+    def __init__(self, moves=None):
+        """
+        :param moves: Genome with the move per frame, a random one if None.
+        """
+        resources = RESOURCES.get()
         self.lvl = resources.lvl_info
         self.fitness = 0.0
         self.is_key_collected = False
@@ -16,25 +62,78 @@ class Game:
         self.is_dead = False
 
         self.agent = Agent()
-        self.moves = [random.randint(0, 3) for _ in range(NUM_FRAMES)]
-        self.enemy_manager = EnemyManager(self.lvl.enemies, self.lvl.spikes)
+        self.moves = Genome.random(NUM_FRAMES) if moves is None else moves
+        self.hazards = resources.hazards
+        self.frame_count = 0  # Last frame simulated, enemies are drawn as they were then
 
         self.num_key_steps = 0
         self.num_door_steps = 0
 
+        # (frame_count, Outcome) before that frame's update, recorded by ObjectEngine
+        self.snapshots = []
+        # Game whose moves this one starts with, kept only until this game is simulated
+        self.parent = None
+        self.divergence = 0  # First frame whose move may differ from the parent's
+
     @classmethod
     def with_moves(cls, moves):
-        game = cls()
-        game.moves = moves[:]
-        return game
+        if not isinstance(moves, Genome):
+            moves = Genome.from_moves(moves)
+        return cls(moves)  # Genomes are immutable, sharing one is safe
 
     @classmethod
     def clone_with_moves(cls, parent):
-        return cls.with_moves(parent.moves)
+        game = cls.with_moves(parent.moves)
+        game.set_parent(parent, len(parent.moves))
+        return game
+
+    def is_active(self):
+        return not (self.is_dead or self.is_complete)
+
+    def set_parent(self, parent, divergence):
+        self.parent = parent
+        self.divergence = divergence
+
+    def inherit_snapshots(self):
+        """Takes over the parent's snapshots from frames where both games are still identical."""
+        parent = self.parent
+        if parent is None:
+            return
+        self.snapshots = [snapshot for snapshot in parent.snapshots if snapshot[0] <= self.divergence]
+        self.parent = None  # Don't keep a chain of ancestors alive
+
+    def resume(self):
+        """
+        Jump to the latest snapshot shared with the parent.
+
+        :return: Frame to continue simulating from, 0 if there is nothing to resume.
+        """
+        self.inherit_snapshots()
+        if not self.snapshots:
+            return 0
+        frame_count, state = self.snapshots[-1]
+        self.apply_outcome(state)
+        return frame_count
 
     def get_current_agent_pos(self):
         return self.agent.pos
 
+    def outcome(self):
+        return Outcome(
+            self.agent.pos, self.is_key_collected, self.is_complete, self.is_dead,
+            self.num_key_steps, self.num_door_steps,
+        )
+
+    def apply_outcome(self, outcome):
+        """Puts the game in the state described by outcome, as if it had been simulated."""
+        self.parent = None
+        self.agent.pos = outcome.pos
+        self.is_key_collected = outcome.is_key_collected
+        self.is_complete = outcome.is_complete
+        self.is_dead = outcome.is_dead
+        self.num_key_steps = outcome.num_key_steps
+        self.num_door_steps = outcome.num_door_steps
+
     def update(self, frame_count):
         if self.is_complete or self.is_dead:
             self.num_door_steps = NUM_FRAMES
@@ -45,13 +144,20 @@ class Game:
         if not self.is_key_collected:
             self.num_key_steps += 1
 
+        self.frame_count = frame_count
         command = AgentCommand.from_int(self.moves[frame_count] if frame_count < len(self.moves) else 0)
         self.agent.update(command, self.is_key_collected)
 
-        self.is_dead = self.enemy_manager.update(self.agent.pos)
+        self.is_dead = self.hazards.is_deadly(frame_count, self.agent.pos)
         self.handle_key_collision()
         self.is_complete = self.check_player_at_door()
 
+        # Finished games count a full horizon from the next frame on; doing it now
+        # means engines can stop updating them straight away
+        if (self.is_dead or self.is_complete) and frame_count + 1 < NUM_FRAMES:
+            self.num_door_steps = NUM_FRAMES
+            self.num_key_steps = NUM_FRAMES
+
     def fitness_score(self, ff_key, ff_door):
         if self.is_complete:
             key_val = NUM_FRAMES - self.num_key_steps + 1.0
@@ -68,19 +174,28 @@ class Game:
         return self.fitness
 
     def update_manual(self, command):
-        self.moves[0] = command.to_int()
+        self.moves = self.moves.mutated({0: AgentCommand.to_int(command)})
         self.update(0)
 
     @staticmethod
     def crossover(first, second):
         split_point = random.randint(0, len(first.moves) - 1)
-        new_moves = first.moves[:split_point] + second.moves[split_point:]
+        new_moves = Genome.splice(first.moves, second.moves, split_point)
 
+        # Up to here the child plays exactly like its first parent
+        divergence = split_point
+        mutations = {}
         for i in range(len(new_moves)):
             if random.random() < MUTATION_PROBABILITY * 0.001:
-                new_moves[i] = random.randint(0, 3)
+                mutations[i] = random.randint(0, 3)
+                if i < divergence and mutations[i] != first.moves[i]:
+                    divergence = i
+        if mutations:
+            new_moves = new_moves.mutated(mutations)
 
-        return Game.with_moves(new_moves)
+        child = Game(new_moves)
+        child.set_parent(first, divergence)
+        return child
 
     def check_player_at_door(self):
         return self.agent.pos == self.lvl.door
@@ -89,25 +204,10 @@ class Game:
         if self.agent.pos == self.lvl.key:
             self.is_key_collected = True
 
-    def draw(self, offset_x, offset_y):
-        scale_factor = UNIT_FRAME_SIZE * FRAME_SCALE
-        w = self.lvl.size[0] * scale_factor
-        h = self.lvl.size[1] * scale_factor
+    def draw(self, offset_x, offset_y, scale_factor=UNIT_FRAME_SIZE * FRAME_SCALE):
+        """
+        :param scale_factor: Size of one tile on screen, in pixels.
+        """
+        from snapshot import GameSnapshot
 
-        background_tint = (116, 242, 145) if self.is_complete else (255, 255, 255)
-        pygame.draw.rect(pygame.display.get_surface(), background_tint, (offset_x, offset_y, w, h))
-
-        if not self.is_key_collected:
-            self._draw_texture(TEXTURES.key_texture, self.lvl.key, scale_factor, offset_x, offset_y)
-
-        if not self.is_dead:
-            self.agent.draw(scale_factor, offset_x, offset_y)
-
-        self.enemy_manager.draw(scale_factor, offset_x, offset_y)
-
-    @staticmethod
-    def _draw_texture(texture, pos, scale_factor, offset_x, offset_y):
-        screen = pygame.display.get_surface()
-        rect = texture.get_rect()
-        rect.topleft = (pos[0] * scale_factor + offset_x, pos[1] * scale_factor + offset_y)
-        screen.blit(texture, rect)
+        GameSnapshot.of(self).draw(offset_x, offset_y, scale_factor)
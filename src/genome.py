@@ -0,0 +1,133 @@
+"""
+Packed move sequences.
+
+Moves are 0-3, so each fits in 2 bits and one byte holds 4 of them, move i in
+bits (i % 4) * 2 of byte i // 4. Unused bits of the last byte are always 0 so
+equal sequences have equal bytes. A Genome is immutable: crossover and
+mutation build new ones.
+"""
+import random
+from itertools import chain
+
+# Byte value -> the 4 moves it holds
+_UNPACKED_BYTES = [tuple((value >> shift) & 3 for shift in (0, 2, 4, 6)) for value in range(256)]
+
+
+class Genome:
+    __slots__ = ("data", "length")
+
+    def __init__(self, data, length):
+        """
+        :param data: Packed moves, (length + 3) // 4 bytes.
+        :param length: Number of moves.
+        """
+        self.data = bytes(data)
+        self.length = length
+
+    @classmethod
+    def from_moves(cls, moves):
+        """Packs a sequence of ints 0-3."""
+        moves = list(moves)
+        length = len(moves)
+        moves.extend([0] * (-length % 4))
+        data = bytes(
+            moves[i] | (moves[i + 1] << 2) | (moves[i + 2] << 4) | (moves[i + 3] << 6)
+            for i in range(0, len(moves), 4)
+        )
+        return cls(data, length)
+
+    @classmethod
+    def random(cls, length, rng=random):
+        """Uniform random moves: every 2-bit group of random bytes is uniform too."""
+        data = bytearray(rng.randbytes((length + 3) // 4))
+        if length % 4:
+            data[-1] &= (1 << (2 * (length % 4))) - 1
+        return cls(data, length)
+
+    @staticmethod
+    def splice(first, second, split_point):
+        """Moves of first before split_point followed by moves of second from split_point on."""
+        byte_index, offset = divmod(split_point, 4)
+        data = bytearray(second.data)
+        data[:byte_index] = first.data[:byte_index]
+        if offset:
+            low_bits = (1 << (2 * offset)) - 1
+            data[byte_index] = (first.data[byte_index] & low_bits) | (second.data[byte_index] & ~low_bits & 0xFF)
+        return Genome(data, second.length)
+
+    def mutated(self, changes):
+        """
+        :param changes: Dict of move index -> new move.
+        :return: A copy with those moves replaced.
+        """
+        data = bytearray(self.data)
+        for i, move in changes.items():
+            shift = (i & 3) << 1
+            data[i >> 2] = (data[i >> 2] & ~(3 << shift) & 0xFF) | (move << shift)
+        return Genome(data, self.length)
+
+    def unpack(self):
+        """All moves as a list of ints."""
+        moves = list(chain.from_iterable(_UNPACKED_BYTES[value] for value in self.data))
+        del moves[self.length:]
+        return moves
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Genome.from_moves(self.unpack()[index])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Genome index out of range")
+        return (self.data[index >> 2] >> ((index & 3) << 1)) & 3
+
+    def __iter__(self):
+        return iter(self.unpack())
+
+    def __bytes__(self):
+        return self.data
+
+    def __eq__(self, other):
+        return isinstance(other, Genome) and self.length == other.length and self.data == other.data
+
+    def __hash__(self):
+        return hash((self.length, self.data))
+
+    def __reduce__(self):
+        return Genome, (self.data, self.length)
+
+    def __repr__(self):
+        return f"Genome({self.unpack()!r})"
+
+
+def pack_matrix(moves):
+    """
+    Packs a (num_genomes, num_moves) NumPy array of moves into Genomes.
+    """
+    import numpy as np
+
+    moves = np.asarray(moves, dtype=np.uint8)
+    if not len(moves):
+        return []  # e.g. no exploration agents, reshape cannot infer the row size of an empty matrix
+    num_moves = moves.shape[1]
+    padded = np.pad(moves, ((0, 0), (0, -num_moves % 4))).reshape(len(moves), -1, 4)
+    packed = padded[..., 0] | (padded[..., 1] << 2) | (padded[..., 2] << 4) | (padded[..., 3] << 6)
+    data = packed.tobytes()
+    row_size = packed.shape[1]
+    return [Genome(data[i:i + row_size], num_moves) for i in range(0, len(data), row_size)]
+
+
+def unpack_matrix(genomes):
+    """
+    Unpacks equally long Genomes into a (num_genomes, num_moves) uint8 NumPy array.
+    """
+    import numpy as np
+
+    num_moves = genomes[0].length
+    packed = np.frombuffer(b"".join(genome.data for genome in genomes), dtype=np.uint8).reshape(len(genomes), -1)
+    shifts = np.array([0, 2, 4, 6], dtype=np.uint8)
+    moves = (packed[..., None] >> shifts) & 3
+    return moves.reshape(len(genomes), -1)[:, :num_moves]
@@ -0,0 +1,96 @@
+"""
+Whole-genome result cache.
+
+The level and its enemies are deterministic, so a move sequence always ends in
+the same Outcome. Retained elites, exact duplicate children and migrants are
+looked up here instead of being simulated again.
+"""
+from collections import OrderedDict
+
+
+class GenomeCache:
+    """Bounded least recently used map from genome.Genome to Outcome."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(moves):
+        # Genomes hash their packed bytes, which is fast and exact
+        return moves
+
+    def get(self, key):
+        outcome = self.entries.get(key)
+        if outcome is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return outcome
+
+    def put(self, key, outcome):
+        self.entries[key] = outcome
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CachedEngine:
+    """Wraps another engine, only simulating genomes the cache has not seen."""
+
+    def __init__(self, engine, cache):
+        """
+        :param engine: Engine with an evaluate(games) method that does the actual simulation.
+        :param cache: GenomeCache shared across generations.
+        """
+        self.engine = engine
+        self.cache = cache
+        # Counters for the last evaluate call, i.e. one generation
+        self.last_hits = 0
+        self.last_misses = 0
+
+    def evaluate(self, games):
+        hits_before = self.cache.hits
+        misses_before = self.cache.misses
+
+        # Genomes to simulate, duplicates within the generation grouped under one key
+        pending = {}
+        for game in games:
+            key = self.cache.key(game.moves)
+            if key in pending:
+                self.cache.hits += 1
+                pending[key].append(game)
+                continue
+
+            outcome = self.cache.get(key)
+            if outcome is None:
+                pending[key] = [game]
+            else:
+                game.inherit_snapshots()  # Its own children may still resume from them
+                game.apply_outcome(outcome)
+
+        if pending:
+            self.engine.evaluate([group[0] for group in pending.values()])
+            for key, group in pending.items():
+                outcome = group[0].outcome()
+                self.cache.put(key, outcome)
+                for game in group[1:]:
+                    game.apply_outcome(outcome)
+                    game.snapshots = group[0].snapshots
+
+        self.last_hits = self.cache.hits - hits_before
+        self.last_misses = self.cache.misses - misses_before
+
+    def close(self):
+        if hasattr(self.engine, "close"):
+            self.engine.close()
@@ -0,0 +1,79 @@
+"""
+Population density heatmap.
+
+Counts how many agents stand on each cell of the level, frame after frame,
+optionally fading older frames out. Drawing turns the counts into colours with
+NumPy, blends them over the level background and hands the result to pygame
+in one surfarray call, so the cost per drawn frame depends on the level size,
+not on the number of games.
+"""
+import numpy as np
+import pygame
+
+from configs import HEATMAP_DECAY
+
+
+class DensityHeatmap:
+    def __init__(self, width, height, decay=HEATMAP_DECAY):
+        """
+        :param width: Level width in tiles.
+        :param height: Level height in tiles.
+        :param decay: Factor counts are multiplied by each frame, 1.0 keeps every frame forever.
+        """
+        self.width = width
+        self.height = height
+        self.decay = decay
+        self.counts = np.zeros(width * height, dtype=np.float32)  # Row-major, like FFInfo fields
+        self.background_pixels = None  # Level background as a float array, read on the first draw
+
+    def accumulate(self, positions):
+        """
+        :param positions: (x, y) of every agent on this frame.
+        """
+        if self.decay != 1.0:
+            self.counts *= self.decay
+        if not positions:
+            return
+        xs, ys = np.array(positions, dtype=np.intp).T
+        self.counts += np.bincount(ys * self.width + xs, minlength=self.counts.size)
+
+    def clear(self):
+        self.counts.fill(0.0)
+
+    def colors(self):
+        """
+        :return: (width, height, 3) uint8 array, black where no agent has been and a
+                 red to yellow to white ramp, log scaled, for the rest.
+        """
+        peak = self.counts.max()
+        if peak <= 0.0:
+            return np.zeros((self.width, self.height, 3), dtype=np.uint8)
+
+        t = np.log1p(self.counts) / np.log1p(peak)
+        ramp = np.stack([t * 3.0, t * 3.0 - 1.0, t * 3.0 - 2.0], axis=-1)
+        rgb = (np.clip(ramp, 0.0, 1.0) * 255.0).astype(np.uint8)
+        rgb[self.counts <= 0.0] = 0
+        # surfarray is indexed [x, y]
+        return rgb.reshape(self.height, self.width, 3).transpose(1, 0, 2)
+
+    def draw(self, surface, offset_x, offset_y, scale_factor, background=None, opacity=0.8, colors=None):
+        """
+        :param scale_factor: Size of one tile on screen, in pixels.
+        :param background: Level background surface to blend over, a whole number of pixels per tile.
+        :param opacity: Weight of the heatmap against the background where agents have been.
+        :param colors: Output of colors() taken earlier, e.g. on the simulation thread. Drawing
+                       from it leaves counts untouched, so they can keep changing meanwhile.
+        """
+        pixels = self.colors() if colors is None else colors
+        if background is not None:
+            if self.background_pixels is None:
+                self.background_pixels = pygame.surfarray.array3d(background).astype(np.float32)
+            tile_pixels = self.background_pixels.shape[0] // self.width
+            heat = pixels.repeat(tile_pixels, axis=0).repeat(tile_pixels, axis=1)
+            is_visited = heat.any(axis=-1, keepdims=True)
+            blended = self.background_pixels * (1.0 - opacity) + heat * opacity
+            pixels = np.where(is_visited, blended, self.background_pixels).astype(np.uint8)
+
+        # Blending is done, so this is a plain opaque scale and blit
+        size = (max(1, round(self.width * scale_factor)), max(1, round(self.height * scale_factor)))
+        surface.blit(pygame.transform.scale(pygame.surfarray.make_surface(pixels), size), (offset_x, offset_y))
@@ -0,0 +1,157 @@
+"""
+Island model genetic algorithm.
+
+Each island is a separate process running its own Population with its own
+retention and exploration rates. Every few generations an island sends copies
+of its best genomes to the next island in a ring and takes in whatever has
+arrived from the previous one. Islands never wait on each other; they only
+push reports to the coordinator, which prints per-island and global best
+fitness and can stop everyone once a level is solved.
+"""
+import multiprocessing
+import queue
+import random
+import time
+
+from resources import init_resources, publish_level
+from settings import HeadlessEditor
+from simulation import Simulation
+
+REPORT_TIMEOUT = 1.0  # Seconds without reports before the coordinator checks for islands that died
+
+
+class IslandConfig:
+    def __init__(self, island_id, num_games, pop_retention_rate, pop_expo_percentage, seed=None):
+        self.island_id = island_id
+        self.num_games = num_games
+        self.pop_retention_rate = pop_retention_rate
+        self.pop_expo_percentage = pop_expo_percentage
+        self.seed = seed
+
+
+class IslandReport:
+    def __init__(self, island_id, generation_count, best_fitness, is_solved):
+        self.island_id = island_id
+        self.generation_count = generation_count
+        self.best_fitness = best_fitness
+        self.is_solved = is_solved
+
+
+def _run_island(config, num_generations, migration_interval, num_migrants, engine_name, level, level_file, inbox, outbox,
+                reports, stop):
+    # Migrants are best effort, never block exiting on a neighbour that already finished
+    inbox.cancel_join_thread()
+    outbox.cancel_join_thread()
+
+    try:
+        if config.seed is not None:
+            random.seed(config.seed)
+
+        init_resources(headless=True, level=level, level_file=level_file)
+        engine = None
+        if engine_name == "batch":
+            from batch import BatchEngine
+            engine = BatchEngine()
+
+        editor = HeadlessEditor()
+        simulation = Simulation(
+            num_games=config.num_games,
+            pop_retention_rate=config.pop_retention_rate,
+            pop_expo_percentage=config.pop_expo_percentage,
+        )
+        simulation.initialize_population()
+
+        for generation in range(1, num_generations + 1):
+            if stop.is_set():
+                break
+
+            simulation.run_generation(editor, engine)
+            population = simulation.population
+            reports.put(IslandReport(config.island_id, generation, population.best_fitness, population.best_is_complete))
+
+            if generation % migration_interval != 0:
+                continue
+
+            # Right after selection the retained elites lead the list, best first
+            outbox.put([game.moves for game in population.games[:num_migrants]])
+            migrants = []
+            while True:
+                try:
+                    migrants.extend(inbox.get_nowait())
+                except queue.Empty:
+                    break
+            if migrants:
+                population.immigrate(migrants)
+    finally:
+        # Sent even if anything above raised, the coordinator waits for every island to report done
+        reports.put(config.island_id)
+
+
+def run_islands(configs, num_generations, migration_interval, num_migrants, engine_name="object", until_solved=False,
+                level=None):
+    """
+    Run every island in its own process and print their progress.
+
+    :param configs: One IslandConfig per island.
+    :param num_generations: Generations each island runs at most.
+    :param migration_interval: Islands exchange genomes every this many generations.
+    :param num_migrants: Number of top genomes each island sends per exchange.
+    :param engine_name: "object" or "batch", the engine each island evaluates with.
+    :param until_solved: Stop every island as soon as one of them completes the level.
+    :param level: Level every island plays, as for resources.init_resources.
+    :return: Best fitness seen across all islands.
+    """
+    # Ring topology: island i sends to island i + 1
+    inboxes = [multiprocessing.Queue() for _ in configs]
+    reports = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    level_file = publish_level(level)
+
+    processes = []
+    for i, config in enumerate(configs):
+        process = multiprocessing.Process(
+            target=_run_island,
+            args=(config, num_generations, migration_interval, num_migrants, engine_name, level, level_file,
+                  inboxes[i], inboxes[(i + 1) % len(configs)], reports, stop),
+            daemon=True,
+        )
+        process.start()
+        processes.append(process)
+
+    start_ts = time.perf_counter()
+    best_by_island = [0.0] * len(configs)
+    first_solve_ts = None
+    finished = set()  # Ids of islands that are done, normally or not
+
+    while len(finished) < len(processes):
+        try:
+            report = reports.get(timeout=REPORT_TIMEOUT)
+        except queue.Empty:
+            # An island killed before it could say it is done never will, count it as finished
+            for island_id, process in enumerate(processes):
+                if island_id not in finished and not process.is_alive():
+                    print(f"Island {island_id} exited with code {process.exitcode}")
+                    finished.add(island_id)
+            continue
+        if isinstance(report, int):
+            finished.add(report)
+            continue
+
+        best_by_island[report.island_id] = max(best_by_island[report.island_id], report.best_fitness)
+        print(f"Island {report.island_id} gen {report.generation_count}: "
+              f"best {report.best_fitness:.2f}, global best {max(best_by_island):.2f}")
+
+        if report.is_solved and first_solve_ts is None:
+            first_solve_ts = time.perf_counter()
+            print(f"Island {report.island_id} solved the level after {first_solve_ts - start_ts:.2f}s")
+            if until_solved:
+                stop.set()
+
+    for process in processes:
+        process.join()
+
+    elapsed = time.perf_counter() - start_ts
+    for island_id, best_fitness in enumerate(best_by_island):
+        print(f"Island {island_id}: best fitness {best_fitness:.2f}")
+    print(f"Global best fitness {max(best_by_island):.2f} in {elapsed:.2f}s")
+    return max(best_by_island)
@@ -1,52 +1,140 @@
+from array import array
+
+from configs import LAYER_WALLS, LAYER_DOOR, LAYER_KEYS, LAYER_PLAYER, LAYER_SPIKES, LAYER_ENEMIES
+
+NO_TILE = -1
+
+
 class GameItem:
+    __slots__ = ("pos", "value")
+
     def __init__(self, pos, value):
         self.pos = pos  # Tuple (x, y)
         self.value = value  # Item value (e.g., tile ID)
 
 
-class LevelInfo:
+class Tilemap:
+    """
+    Tile layers of a Tiled JSON map, decoded once into dense row-major grids.
+
+    Walls and doors also get one byte per cell, so collision queries are a
+    single index. Every position query is bounds checked.
+    """
+
     def __init__(self, map_data):
-        self.size = self.parse_size(map_data)
-        self.key = self.get_one_item(map_data, "layer_keys")
-        self.door = self.get_one_item(map_data, "layer_door")
-        self.agent = self.get_one_item(map_data, "layer_player")
-        self.spikes = self.get_all_items(map_data, "layer_spikes")
-        self.enemies = self.get_all_items(map_data, "layer_enemies")
+        self.width = map_data["width"]
+        self.height = map_data["height"]
+        first_gid = map_data["tilesets"][0]["firstgid"]
+
+        # Tiled stores global ids with 0 meaning "no tile", tile ids start at 0
+        self.tiles = {}  # Layer name -> array of tile ids, NO_TILE where empty
+        self.items = {}  # Layer name -> GameItem per tile, in column-major order
+        for layer in map_data["layers"]:
+            if layer.get("type") != "tilelayer":
+                continue
+            if (layer["width"], layer["height"]) != (self.width, self.height):
+                raise ValueError(f"Layer {layer['name']} does not match the map size")
+
+            tiles = array("h", (gid - first_gid if gid else NO_TILE for gid in layer["data"]))
+            self.tiles[layer["name"]] = tiles
+            self.items[layer["name"]] = [
+                GameItem((x, y), tiles[y * self.width + x])
+                for x in range(self.width)
+                for y in range(self.height)
+                if tiles[y * self.width + x] != NO_TILE
+            ]
+
+        self.walls = self.layer_mask(LAYER_WALLS)
+        self.doors = self.layer_mask(LAYER_DOOR)
+
+    @classmethod
+    def from_layers(cls, width, height, tiles, items, walls=None, doors=None):
+        """
+        Build a tilemap from already decoded layers, e.g. a compiled level.
+
+        :param tiles: Layer name -> row-major sequence of tile ids, NO_TILE where empty.
+        :param items: Layer name -> GameItem list, in column-major order.
+        :param walls: Precomputed layer_mask of the walls, derived from tiles if None.
+        :param doors: Precomputed layer_mask of the doors, derived from tiles if None.
+        """
+        tilemap = cls.__new__(cls)
+        tilemap.width = width
+        tilemap.height = height
+        tilemap.tiles = tiles
+        tilemap.items = items
+        tilemap.walls = walls if walls is not None else tilemap.layer_mask(LAYER_WALLS)
+        tilemap.doors = doors if doors is not None else tilemap.layer_mask(LAYER_DOOR)
+        return tilemap
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def layer_mask(self, layer_name):
+        """One byte per cell, 1 where the layer has a tile."""
+        tiles = self.tiles.get(layer_name)
+        if tiles is None:
+            return bytearray(self.width * self.height)
+        return bytearray(tile != NO_TILE for tile in tiles)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get_tile(self, layer_name, x, y):
+        """Returns the tile id at (x, y), or None if there is no tile."""
+        tiles = self.tiles.get(layer_name)
+        if tiles is None or not self.in_bounds(x, y):
+            return None
+        tile = tiles[y * self.width + x]
+        return None if tile == NO_TILE else tile
+
+    def get_items(self, layer_name):
+        return self.items.get(layer_name, [])
+
+    def is_wall(self, x, y):
+        """Anything outside the map counts as a wall."""
+        if not self.in_bounds(x, y):
+            return True
+        return self.walls[y * self.width + x] != 0
+
+    def is_door(self, x, y):
+        if not self.in_bounds(x, y):
+            return False
+        return self.doors[y * self.width + x] != 0
+
+    def is_passable(self, x, y, has_key):
+        """Whether the agent can stand on (x, y); doors only open once the key is collected."""
+        if not self.in_bounds(x, y):
+            return False
+        i = y * self.width + x
+        return not self.walls[i] and (has_key or not self.doors[i])
+
+
+class LevelInfo:
+    def __init__(self, tilemap):
+        self.size = self.parse_size(tilemap)
+        self.key = self.get_one_item(tilemap, LAYER_KEYS)
+        self.door = self.get_one_item(tilemap, LAYER_DOOR)
+        self.agent = self.get_one_item(tilemap, LAYER_PLAYER)
+        self.spikes = self.get_all_items(tilemap, LAYER_SPIKES)
+        self.enemies = self.get_all_items(tilemap, LAYER_ENEMIES)
 
     @staticmethod
-    def parse_size(map_data):
-        walls_layer = map_data["layers"].get("layer_walls")
-        if not walls_layer:
+    def parse_size(tilemap):
+        if LAYER_WALLS not in tilemap.tiles:
             raise ValueError("No walls layer found in the map")
-        return walls_layer["width"], walls_layer["height"]
+        return tilemap.size
 
     @staticmethod
-    def get_one_item(map_data, layer_name):
-        layer = map_data["layers"].get(layer_name)
-        if not layer:
+    def get_one_item(tilemap, layer_name):
+        if layer_name not in tilemap.tiles:
             raise ValueError(f"Layer {layer_name} not found in the map")
 
-        for i in range(layer["width"]):
-            for j in range(layer["height"]):
-                if layer["tiles"][j][i]:
-                    return (i, j)
-        raise ValueError(f"No item found in layer {layer_name}")
+        items = tilemap.get_items(layer_name)
+        if not items:
+            raise ValueError(f"No item found in layer {layer_name}")
+        return items[0].pos
 
     @staticmethod
-    def get_all_items(map_data, layer_name):
-        items = []
-        layer = map_data["layers"].get(layer_name)
-        if not layer:
-            return items
-
-        for i in range(layer["width"]):
-            for j in range(layer["height"]):
-                tile = layer["tiles"][j][i]
-                if tile:
-                    items.append(GameItem((i, j), tile))
-        return items
-
-
-# Example usage
-# This assumes map_data is loaded from a JSON file that mirrors the structure of the original Map object.
-# Example: map_data = json.load(open("path_to_map.json"))
+    def get_all_items(tilemap, layer_name):
+        return list(tilemap.get_items(layer_name))
@@ -1,17 +1,25 @@
 # Importing modules (equivalent to pub mod in Rust)
-import agent
-import camera
+# Submodules load on first attribute access, so `import lib` stays as cheap as the
+# parts actually used and the simulation core never pulls in pygame by itself.
+import importlib
+
 import configs
-import editor
-import enemy
-import ff
-import game
-import level
-import population
-import resources
-import simulation
 
 # Exposing specific items (equivalent to pub use in Rust)
 from configs import *  # Import all configurations
 from resources import RESOURCES, TEXTURES  # Specific imports
-from simulation import Simulation  # Specific imports
+
+_MODULES = ("agent", "camera", "editor", "enemy", "ff", "game", "level", "population", "resources", "simulation")
+_ITEMS = {"Simulation": "simulation"}  # Name -> module it comes from
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return importlib.import_module(name)
+    if name in _ITEMS:
+        return getattr(importlib.import_module(_ITEMS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES) | set(_ITEMS))
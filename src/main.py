@@ -1,8 +1,14 @@
+import argparse
+import os
 import pygame
 import time
 from resources import init_resources
 from editor import Editor
 from simulation import Simulation, SimulationStats
+from timings import TIMINGS
+from runner import SimulationRunner
+from scheduler import AdaptiveStepper, RateCounter
+from configs import CHECKPOINT_INTERVAL
 from pygame.locals import *
 
 # Configuration constants
@@ -24,60 +30,123 @@ pygame.display.set_caption(WINDOW_TITLE)
 
 clock = pygame.time.Clock()
 
+def run_checkpoint_path(path, run):
+    """
+    Checkpoint file of the run-th restart: run.esck, then run.1.esck, run.2.esck and
+    so on, so a new run never overwrites the population the restart dropped.
+    """
+    if not run:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{run}{ext}"
+
 def main():
     """
     The main function that initializes resources, simulation, and editor, and then runs the simulation loop.
     """
-    init_resources()  # This will initialize RESOURCES and TEXTURES
+    parser = argparse.ArgumentParser(description="Escape the room genetic algorithm, with a window.")
+    parser.add_argument("--level", default=None, help="Level name (e.g. lvl2) or path to a Tiled JSON level.")
+    parser.add_argument("--timings", default=None,
+                        help="Time every phase from the start and write the history here on exit (.csv or .jsonl).")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Save the population here every --checkpoint-every generations and on exit.")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_INTERVAL,
+                        help="Generations between checkpoints.")
+    parser.add_argument("--resume", default=None,
+                        help="Carry on from this checkpoint, and keep checkpointing to it unless --checkpoint is given.")
+    parser.add_argument("--sim-thread", action="store_true",
+                        help="Run the simulation on its own thread at full speed and draw its latest snapshot.")
+    args = parser.parse_args()
+    if args.timings:
+        TIMINGS.enable()
+    checkpoint_path = args.checkpoint or args.resume
+
+    init_resources(level=args.level)  # This will initialize RESOURCES and TEXTURES
+
+    def new_simulation(resume_path=None, run=0):
+        simulation = Simulation()
+        if resume_path:
+            try:
+                simulation.resume(resume_path)
+            except (OSError, ValueError) as e:
+                raise SystemExit(f"Cannot resume from {resume_path}: {e}")
+        else:
+            simulation.initialize_population()
+        if checkpoint_path:
+            simulation.enable_checkpoints(run_checkpoint_path(checkpoint_path, run), args.checkpoint_every)
+        return simulation
 
     # Create instances of Editor and Simulation
     editor = Editor()
-    simulation = Simulation()
-    simulation.initialize_population()
+    simulation = new_simulation(args.resume)
+    num_restarts = 0
+    runner = None
+    if args.sim_thread:
+        runner = SimulationRunner(simulation, editor)
+        runner.start()
+    stepper = AdaptiveStepper()
+    runner_rate = RateCounter()
     # Create a SimulationStats instance to hold simulation statistics
     stats = SimulationStats()
 
     running = True
     while running:
+        frame_start = time.perf_counter()
         # Clear the screen before drawing new frame
         screen.fill(WINDOW_BACKGROUND_COLOR[:3])
 
-        # Handle frame skipping if enabled in the editor settings
-        if editor.settings.is_frame_skip:
-            for _ in range(10):
-                stats = simulation.update(editor) or stats
-
-        # Update the simulation and draw it
-        stats = simulation.update(editor) or stats
-        simulation.draw(editor, screen)
+        if runner is not None:
+            # The simulation steps on its own, draw whatever it last published
+            snapshot = runner.snapshots.latest()
+            stats = SimulationStats(snapshot.frame_count, snapshot.generation_count)
+            simulation.draw(editor, snapshot)
+            updates_per_sec = runner_rate.sample(runner.num_updates)
+        else:
+            simulation.draw(editor)
+            updates_per_sec = stepper.updates_per_sec()
 
         # Update and draw editor if necessary
-        editor.update()
-        editor.draw(stats, screen)
+        events = pygame.event.get()
+        editor.update(events)
+        editor.draw(stats, clock.get_fps(), updates_per_sec)
 
         # Slow mode handling if enabled in the editor settings
-        if editor.settings.slow_mode:
+        if editor.settings.slow_mode and runner is None:
             time.sleep(0.2)
 
         # Restart the simulation if the restart flag is set
         if editor.settings.is_restart:
             editor.settings.is_restart = False
-            simulation = Simulation()  # Reset the simulation to start a new one
+            if runner is not None:
+                runner.stop()
+            simulation.close()  # With checkpoints on, the population being dropped is saved first
+            num_restarts += 1
+            simulation = new_simulation(run=num_restarts)  # Reset the simulation to start a new one
+            if checkpoint_path:
+                print(f"Restarted, checkpoints now go to {run_checkpoint_path(checkpoint_path, num_restarts)}")
+            if runner is not None:
+                runner = SimulationRunner(simulation, editor)
+                runner.start()
 
         # Check for exit events (close window or press ESC)
-        for event in pygame.event.get():
+        for event in events:
             if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
                 running = False
 
-        # Handle draw toggle if the editor's settings disable drawing
-        if not editor.settings.is_draw:
-            for _ in range(100):
-                stats = simulation.update(editor) or stats
+        # Fill what is left of the frame with updates, as many as sim speed wants and the budget allows
+        if runner is None:
+            stats = stepper.step(simulation, editor, frame_start) or stats
 
         # Update the display with the new frame and control the frame rate
         pygame.display.flip()
-        clock.tick(60)  # Adjust the frame rate as needed (60 FPS here)
-
+        clock.tick(editor.settings.target_fps)
+        TIMINGS.end_frame()
+
+    if runner is not None:
+        runner.stop()
+    simulation.close()
+    if args.timings:
+        TIMINGS.export(args.timings)
     pygame.quit()  # Close Pygame gracefully when the loop exits
 
 if __name__ == "__main__":
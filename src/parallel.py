@@ -0,0 +1,83 @@
+"""
+Process pool evaluation of a population.
+
+Games don't interact until Population.selection, so a generation splits into
+independent chunks. Each worker attaches to the level when it starts, mapping
+the compiled level file the parent published rather than loading its own, then
+for every task receives packed move sequences and sends back only the compact
+final state fitness needs (see game.Outcome).
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from game import Game, Outcome, ObjectEngine
+from genome import unpack_matrix
+from resources import init_resources, publish_level
+
+_engine = None  # Per worker: game.ObjectEngine or batch.BatchEngine
+
+
+def _init_worker(engine_name, level, level_file):
+    global _engine
+    init_resources(headless=True, level=level, level_file=level_file)
+    if engine_name == "batch":
+        from batch import BatchEngine
+        _engine = BatchEngine()
+    else:
+        # Snapshots only help games resumed in this process, worker games never come back
+        _engine = ObjectEngine(snapshot_interval=0)
+
+
+def _simulate_chunk(chunk):
+    """
+    Runs in a worker.
+
+    :param chunk: List of genomes, one per game.
+    :return: List of plain outcome tuples, in the same order.
+    """
+    if not isinstance(_engine, ObjectEngine):
+        return [tuple(outcome) for outcome in _engine.run(unpack_matrix(chunk)).outcomes()]
+
+    games = [Game(moves) for moves in chunk]
+    _engine.evaluate(games)
+    return [tuple(game.outcome()) for game in games]
+
+
+class ParallelEvaluator:
+    def __init__(self, num_workers=None, engine_name="object", level=None):
+        """
+        Start a persistent pool of workers.
+
+        :param num_workers: Number of processes, defaults to the number of cores.
+        :param engine_name: Engine each worker runs its chunk with, "object" or "batch".
+        :param level: Level every worker loads, as for resources.init_resources.
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_init_worker,
+            initargs=(engine_name, level, publish_level(level)),
+        )
+
+    def evaluate(self, games):
+        """Simulate games across the pool and store each final state back into its Game."""
+        if not games:
+            return
+
+        chunk_size = -(-len(games) // self.num_workers)  # Ceiling division
+        packed = [game.moves for game in games]  # Genomes pickle as their packed bytes
+        chunks = [packed[i:i + chunk_size] for i in range(0, len(packed), chunk_size)]
+
+        results = self.executor.map(_simulate_chunk, chunks)
+        outcomes = (outcome for chunk_outcomes in results for outcome in chunk_outcomes)
+        for game, outcome in zip(games, outcomes):
+            game.apply_outcome(Outcome(*outcome))
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,80 +1,140 @@
 import random
-import pygame
+import itertools
 from collections import defaultdict
 from game import Game  # Assuming Game is implemented elsewhere
+from genome import pack_matrix, unpack_matrix
 from agent import AgentCommand
-from configs import UNIT_FRAME_SIZE, FRAME_SCALE
-from resources import RESOURCES, init_resources
-
-from ff import FF
-
-class FFInfo:
-    def __init__(self):
-        if RESOURCES is None or RESOURCES.lvl_info is None:
-            raise RuntimeError("RESOURCES or lvl_info is not initialized properly.")
-        self.key = FF(RESOURCES.lvl_info["key"], RESOURCES.lvl_info["size"]).solve()
-        self.door = FF(RESOURCES.lvl_info["door"], RESOURCES.lvl_info["size"]).solve()
+from configs import NUM_FRAMES
+from resources import RESOURCES
 
 class Population:
-    def __init__(self, num_games, pop_retention_rate, pop_expo_percentage, num_games_in_row):
-        self.ff_info = FFInfo()
-        self.games = [Game() for _ in range(num_games)]
+    def __init__(self, num_games, pop_retention_rate, pop_expo_percentage, num_games_in_row, breeder=None, genomes=None):
+        """
+        :param breeder: breeding.Breeder for vectorized selection, None to breed game by game.
+        :param genomes: Moves of every game, e.g. from a checkpoint, instead of random ones.
+        """
+        self.breeder = breeder
+        # Built once per level, here rather than in the first selection so that one isn't charged for importing NumPy
+        self.fitness_table = RESOURCES.get().fitness_table
+        if genomes is not None:
+            self.games = [Game(moves) for moves in genomes]
+        elif breeder is None:
+            self.games = [Game() for _ in range(num_games)]
+        else:
+            self.games = [Game(moves) for moves in pack_matrix(breeder.random_moves(num_games, NUM_FRAMES))]
         self.num_games = num_games
         self.pop_retention_rate = pop_retention_rate
         self.pop_expo_percentage = pop_expo_percentage
         self.num_games_in_row = num_games_in_row
 
+        self.active_games = list(self.games)  # Games that are neither dead nor complete
+        self.active_counts = []  # len(active_games) on each frame of this generation
+
+        # Best game of the last generation that went through selection
+        self.best_fitness = 0.0
+        self.best_is_complete = False
+
     def update(self, frame_count, editor):
         # User input applies only to the first game
-        self.handle_user_input()
+        if not editor.settings.is_headless:
+            self.handle_user_input()
 
-        if not editor.settings['is_ai_enabled']:
+        if not editor.settings.is_ai_enabled:
             return
 
-        for game in self.games:
+        for game in self.active_games:
             game.update(frame_count)
 
+        # Drop games that just finished from the per-frame loop
+        self.active_games = [game for game in self.active_games if game.is_active()]
+        self.active_counts.append(len(self.active_games))
+
+    def is_finished(self):
+        """Whether every game of this generation is dead or complete."""
+        return not self.active_games
+
+    def evaluate(self, engine):
+        """
+        Simulate every game for the full horizon in one go.
+
+        :param engine: Object with an evaluate(games) method, e.g. batch.BatchEngine.
+        """
+        engine.evaluate(self.games)
+
     def selection(self):
         gene_pool = self.calc_fitness()
         new_games = []
 
+        # This generation becomes the parents, its own parents are no longer needed
+        for game in self.games:
+            game.parent = None
+
         num_retained = int(self.num_games * (self.pop_retention_rate / 100))
         num_expo = int(self.num_games * (self.pop_expo_percentage / 100))
         num_children = self.num_games - num_retained - num_expo
 
-        for _ in range(num_children):
-            first = random.choices(self.games, weights=gene_pool)[0]
-            second = random.choices(self.games, weights=gene_pool)[0]
-            new_game = Game.crossover(first, second)
-            new_games.append(new_game)
+        if num_children > 0:
+            new_games = self.breed(gene_pool, num_children)
 
         # Retain the best games from the current generation
         self.games.sort(key=lambda g: g.fitness, reverse=True)
+        self.best_fitness = self.games[0].fitness
+        self.best_is_complete = self.games[0].is_complete
         retained_agents = [Game.clone_with_moves(game) for game in self.games[:num_retained]]
 
         # Exploration agents
-        exploration_agents = [Game() for _ in range(num_expo)]
+        if self.breeder is None:
+            exploration_agents = [Game() for _ in range(num_expo)]
+        else:
+            num_moves = len(self.games[0].moves)
+            exploration_agents = [Game(moves) for moves in pack_matrix(self.breeder.random_moves(num_expo, num_moves))]
 
         self.games = retained_agents + exploration_agents + new_games
+        self.active_games = list(self.games)
+        self.active_counts = []
+
+    def breed(self, gene_pool, num_children):
+        """
+        Crossover children of parents drawn in proportion to gene_pool.
+
+        The cumulative weights are built once and all parents drawn in one batch,
+        with the vectorized breeder when there is one.
+        """
+        if self.breeder is None:
+            cum_weights = list(itertools.accumulate(gene_pool))
+            parents = random.choices(self.games, cum_weights=cum_weights, k=2 * num_children)
+            return [Game.crossover(first, second) for first, second in zip(parents[::2], parents[1::2])]
+
+        moves = unpack_matrix([game.moves for game in self.games])
+        children, first, divergence = self.breeder.breed(moves, gene_pool, num_children)
+        new_games = []
+        for child_moves, parent_index, child_divergence in zip(pack_matrix(children), first.tolist(), divergence.tolist()):
+            child = Game(child_moves)
+            child.set_parent(self.games[parent_index], child_divergence)
+            new_games.append(child)
+        return new_games
+
+    def immigrate(self, moves_list):
+        """
+        Replace the last games of the generation (bred children) with migrants from another population.
+
+        :param moves_list: Move sequences of the incoming games.
+        """
+        for i, moves in enumerate(moves_list[:self.num_games]):
+            self.games[-1 - i] = Game.with_moves(moves)
+        self.active_games = list(self.games)
 
     def calc_fitness(self):
-        max_fitness = 0.0
-        weights = []
-
-        for game in self.games:
-            agent_pos = game.get_current_agent_pos()
-            ff_key = self.ff_info.key.get(agent_pos, 0)
-            ff_door = self.ff_info.door.get(agent_pos, 0)
-            fitness = game.fitness(ff_key, ff_door)
-            max_fitness = max(max_fitness, fitness)
-            weights.append(fitness)
+        """
+        Score every game from the level's fitness table, see fitness.FitnessTable.
 
-        if max_fitness > 0:
-            weights = [weight / max_fitness * 100.0 for weight in weights]
-
-        return weights
+        :return: Selection weights in population order, the best game at 100.
+        """
+        return self.fitness_table.score_games(self.games)
 
     def handle_user_input(self):
+        import pygame
+
         keys = pygame.key.get_pressed()
         if keys[pygame.K_w]:
             self.games[0].update_manual(AgentCommand.TOP)
@@ -84,23 +144,3 @@ class Population:
             self.games[0].update_manual(AgentCommand.BOTTOM)
         elif keys[pygame.K_d]:
             self.games[0].update_manual(AgentCommand.RIGHT)
-
-    def draw(self, editor):
-        if not editor.settings['is_show_multiple']:
-            self.games[0].draw(0, 0)
-            return
-
-        offset_x = 0
-        offset_y = 0
-        grid_padding = 40
-        game_width, game_height = self.games[0].lvl.size
-        game_width *= UNIT_FRAME_SIZE * FRAME_SCALE
-        game_height *= UNIT_FRAME_SIZE * FRAME_SCALE
-
-        for game in self.games:
-            game.draw(offset_x, offset_y)
-            offset_x += game_width + grid_padding
-
-            if offset_x >= game_width * self.num_games_in_row:
-                offset_y += game_height + grid_padding
-                offset_x = 0
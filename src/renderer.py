@@ -0,0 +1,140 @@
+"""
+Level and sprite rendering from the Tiled tileset.
+
+tileset.png holds every tile the levels are built from and every dynamic
+sprite, so it is the only image loaded. TileAtlas keeps it scaled once per
+tile size and draws sprites as sub-rect blits of that one surface.
+LevelRenderer composes a level's static layers into a single surface per tile
+size, so a game's background costs one blit however many tiles it has.
+"""
+import pygame
+
+from configs import UNIT_FRAME_SIZE, LAYER_BACKGROUND, LAYER_WALLS, LAYER_DOOR, RENDER_CACHE_MAX_SIZE
+from level import NO_TILE
+
+STATIC_LAYERS = (LAYER_BACKGROUND, LAYER_WALLS, LAYER_DOOR)  # Bottom to top, never change during a game
+LEVEL_FILL_COLOR = (255, 255, 255)  # Under cells no static layer covers
+
+# Sprite name -> (tile id of its top-left tile, size in tiles)
+SPRITE_TILES = {
+    "agent": (48, 1),
+    "agent_sleep1": (75, 1),
+    "agent_sleep2": (51, 1),
+    "agent_sleep3": (108, 1),
+    "key": (30, 1),
+    "crab": (76, 1),
+    "small_spike": (101, 1),
+    "large_spike": (104, 2),
+}
+
+
+def tile_pixels(tile_size):
+    """Whole pixels per tile on screen, what every cache here is keyed by."""
+    return max(1, round(tile_size))
+
+
+class TileAtlas:
+    def __init__(self, tileset, source_tile_size=int(UNIT_FRAME_SIZE), max_cached=2):
+        """
+        :param tileset: The tileset surface, already converted for the display.
+        :param source_tile_size: Pixels per tile in the tileset image.
+        :param max_cached: Number of tile sizes to keep a scaled tileset for.
+        """
+        self.tileset = tileset
+        self.source_tile_size = source_tile_size
+        self.columns = tileset.get_width() // source_tile_size
+        self.max_cached = max_cached
+        self.scaled_tilesets = {}  # Pixels per tile -> whole tileset at that size, oldest first
+
+    def tile_rect(self, tile_id, size, size_in_tiles=1):
+        """Area of a tile, and the size_in_tiles square from it, in the tileset scaled to size pixels per tile."""
+        row, col = divmod(tile_id, self.columns)
+        return pygame.Rect(col * size, row * size, size_in_tiles * size, size_in_tiles * size)
+
+    def scaled(self, tile_size):
+        """
+        :return: The tileset with tiles tile_size pixels across, or None if that
+                 would be larger than RENDER_CACHE_MAX_SIZE.
+        """
+        size = tile_pixels(tile_size)
+        tileset = self.scaled_tilesets.get(size)
+        if tileset is None:
+            rows = -(-self.tileset.get_height() // self.source_tile_size)  # Ceiling division
+            scaled_size = (self.columns * size, rows * size)
+            if max(scaled_size) > RENDER_CACHE_MAX_SIZE:
+                return None
+            # Pad to whole tiles first, so every tile edge lands on an exact pixel
+            source = pygame.Surface((self.columns * self.source_tile_size, rows * self.source_tile_size), pygame.SRCALPHA)
+            source.blit(self.tileset, (0, 0))
+            tileset = pygame.transform.scale(source, scaled_size).convert_alpha()
+            if len(self.scaled_tilesets) >= self.max_cached:
+                del self.scaled_tilesets[next(iter(self.scaled_tilesets))]
+            self.scaled_tilesets[size] = tileset
+        return tileset
+
+    def sprite(self, name):
+        """A named sprite at the tileset's own size, sharing the tileset's pixels."""
+        tile_id, size_in_tiles = SPRITE_TILES[name]
+        return self.tileset.subsurface(self.tile_rect(tile_id, self.source_tile_size, size_in_tiles))
+
+    def blit(self, surface, name, dest, tile_size):
+        """Draws a named sprite with its top-left corner at dest, scaled to tile_size pixels per tile."""
+        tile_id, size_in_tiles = SPRITE_TILES[name]
+        size = tile_pixels(tile_size)
+        tileset = self.scaled(size)
+        if tileset is None:
+            # Zoomed in too far to keep a scaled tileset around
+            sprite = pygame.transform.scale(self.sprite(name), (size_in_tiles * size, size_in_tiles * size))
+            surface.blit(sprite, dest)
+            return
+        surface.blit(tileset, dest, self.tile_rect(tile_id, size, size_in_tiles))
+
+
+class LevelRenderer:
+    def __init__(self, tilemap, atlas, max_cached=4):
+        """
+        :param tilemap: level.Tilemap to draw the static layers of.
+        :param atlas: TileAtlas the tiles come from.
+        :param max_cached: Number of tile sizes to keep a composed level for.
+        """
+        self.tilemap = tilemap
+        self.atlas = atlas
+        self.max_cached = max_cached
+        self.backgrounds = {}  # Pixels per tile -> composed static layers, oldest first
+
+    def background(self, tile_size):
+        """
+        :return: Every static layer composed into one surface with tiles tile_size
+                 pixels across, or None if it would be larger than RENDER_CACHE_MAX_SIZE.
+        """
+        size = tile_pixels(tile_size)
+        background = self.backgrounds.get(size)
+        if background is None:
+            background = self.compose(size)
+            if background is None:
+                return None
+            if len(self.backgrounds) >= self.max_cached:
+                del self.backgrounds[next(iter(self.backgrounds))]
+            self.backgrounds[size] = background
+        return background
+
+    def compose(self, size):
+        width, height = self.tilemap.size
+        if max(width, height) * size > RENDER_CACHE_MAX_SIZE:
+            return None
+        tileset = self.atlas.scaled(size)
+        if tileset is None:
+            return None
+
+        background = pygame.Surface((width * size, height * size)).convert()
+        background.fill(LEVEL_FILL_COLOR)
+        for layer_name in STATIC_LAYERS:
+            tiles = self.tilemap.tiles.get(layer_name)
+            if tiles is None:
+                continue
+            background.blits([
+                (tileset, (i % width * size, i // width * size), self.atlas.tile_rect(tile, size))
+                for i, tile in enumerate(tiles)
+                if tile != NO_TILE
+            ], doreturn=False)
+        return background
@@ -1,90 +1,129 @@
-import pygame
 import os
-import json
+
+from compiled_level import attach_level, load_level
+from configs import LVL_MAP_PATH, TILESET_PATH
 
 class Resources:
-    def __init__(self, level_map_path, level_background_sprite_path, tileset_path):
-        print(f"Loading map from: {level_map_path}")  # Debugging line
-        self.lvl_map = self.load_map(level_map_path)
-        self.lvl_background_sprite = self.load_texture(level_background_sprite_path)
-        self.lvl_info = self.parse_level_info()
-        print(f"Level info initialized: {self.lvl_info}")  # Debugging line
+    def __init__(self, level_map_path, level=None):
+        """
+        :param level_map_path: Tiled JSON level, loaded through its compiled file (see compiled_level).
+        :param level: compiled_level.CompiledLevel already loaded for it, e.g. attached in a worker.
+        """
+        self.level_map_path = level_map_path
+        self.level = level if level is not None else load_level(level_map_path)
+        self.level_hash = self.level.level_hash
+        self.tilemap = self.level.tilemap
+        self.lvl_info = self.level.lvl_info
+        self.hazards = self.level.hazards
+        self.ff_info = self.level.ff_info
+        self._fitness_table = None
 
-    @staticmethod
-    def load_texture(path):
-        """Loads a texture from a given path."""
-        try:
-            texture = pygame.image.load(path).convert_alpha()
-            return pygame.transform.scale(texture, texture.get_rect().size)
-        except pygame.error as e:
-            raise RuntimeError(f"Failed to load texture: {path}, {e}")
+    @property
+    def fitness_table(self):
+        """fitness.FitnessTable of the level, built on first use so loading a level never imports NumPy."""
+        if self._fitness_table is None:
+            from fitness import FitnessTable
+            self._fitness_table = FitnessTable(self.ff_info, self.lvl_info.size)
+        return self._fitness_table
 
-    @staticmethod
-    def load_map(path):
-        """Loads a JSON map file from the specified path."""
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Map file not found at path: {path}")
-        with open(path, 'r') as file:
-            return json.load(file)
-
-    def parse_level_info(self):
-        """Parses level info from the map JSON."""
-        try:
-            width = self.lvl_map.get("width", None)
-            height = self.lvl_map.get("height", None)
-            tile_width = self.lvl_map.get("tilewidth", None)
-            tile_height = self.lvl_map.get("tileheight", None)
-
-            if not all([width, height, tile_width, tile_height]):
-                raise ValueError("Incomplete map dimensions in lvl_map")
-
-            print(f"Parsed map dimensions: width={width}, height={height}, "
-                  f"tile_width={tile_width}, tile_height={tile_height}")  # Debugging line
-
-            return {
-                "width": width,
-                "height": height,
-                "tile_width": tile_width,
-                "tile_height": tile_height,
-            }
-        except Exception as e:
-            raise RuntimeError(f"Failed to parse level info: {e}")
+class Global:
+    """A value that is set once at startup and shared by every module that imported it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.value = None
+        self.factory = None
+
+    def get(self):
+        if self.value is None:
+            if self.factory is None:
+                raise RuntimeError(f"{self.name} is not initialized. Please call init_resources() first.")
+            self.value = self.factory()
+            self.factory = None
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        self.factory = None
+
+    def defer(self, factory):
+        """Build the value with factory() on the first get() instead of now."""
+        self.value = None
+        self.factory = factory
+
+    def is_set(self):
+        return self.value is not None
+
+REPOSITORY_ROOT = os.path.join(os.path.dirname(__file__), '..')
 
 # Global resources and textures
-RESOURCES = None
-TEXTURES = None
+RESOURCES = Global("RESOURCES")
+TEXTURES = Global("TEXTURES")
+
+def level_path(level):
+    """
+    :param level: Level name such as "lvl2", or a path to a Tiled JSON level.
+    :return: Path to the level's JSON file.
+    """
+    if os.path.exists(level):
+        return level
+    return os.path.join(REPOSITORY_ROOT, 'assets', f'{level}.json')
+
 
-def init_resources():
-    global RESOURCES, TEXTURES
-    print("Initializing resources...")  # Debugging line
+def init_resources(headless=False, level=None, level_file=None):
+    """
+    Load the level and, unless running headless, arrange for the textures to load on first draw.
 
-    # Adjust paths to be relative to the script's location
-    level_map_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'lvl1.json')
-    level_background_sprite_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'lvl1.png')
-    tileset_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'tileset.png')
+    Nothing here imports pygame: the textures need a display, which only exists
+    once the window is open, and headless runs never draw at all.
 
-    RESOURCES = Resources(level_map_path, level_background_sprite_path, tileset_path)
-    TEXTURES = Textures()
+    :param headless: Skip everything that needs a display, i.e. the textures.
+    :param level: Level name or path, see level_path. Defaults to LVL_MAP_PATH.
+    :param level_file: Compiled file of the level from publish_level, mapped as is. Worker
+                       processes pass it to share the parent's level instead of loading their own.
+    """
+    level_map_path = level_path(level) if level else os.path.join(REPOSITORY_ROOT, LVL_MAP_PATH)
+    compiled = attach_level(level_file) if level_file else None
+    RESOURCES.set(Resources(level_map_path, compiled))
 
-    print("Resources initialized successfully.")
-    print("Textures initialized successfully.")
+    if headless:
+        return
+
+    tilemap = RESOURCES.get().tilemap
+    TEXTURES.defer(lambda: Textures(os.path.join(REPOSITORY_ROOT, TILESET_PATH), tilemap))
+
+def publish_level(level=None):
+    """
+    Make sure the level's compiled file is up to date, for worker processes to map
+    with init_resources(level_file=...). Every process that maps it shares the same
+    pages, so an extra worker costs the same whatever the level's size.
+
+    :param level: Level name or path, as for init_resources.
+    :return: Path of the compiled file, None if it could not be written (workers then load the level themselves).
+    """
+    level_map_path = level_path(level) if level else os.path.join(REPOSITORY_ROOT, LVL_MAP_PATH)
+    return load_level(level_map_path).path
 
 class Textures:
-    def __init__(self):
-        self.agent_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'agent.png'))
-        self.agent_sleep1_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'agent_sleeping.png'))
-        self.agent_sleep2_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'agent_sleeping_2.png'))
-        self.agent_sleep3_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'agent_sleeping_3.png'))
-        self.key_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'key.png'))
-        self.crab_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'crab.png'))
-        self.small_spike_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'small_spike.png'))
-        self.large_spike_texture = self.get_texture(os.path.join(os.path.dirname(__file__), '..', 'assets', 'large_spike.png'))
+    def __init__(self, tileset_path, tilemap):
+        """
+        :param tileset_path: tileset.png, the one image every tile and sprite is cut from.
+        :param tilemap: level.Tilemap whose static layers get pre-rendered.
+        """
+        from renderer import TileAtlas, LevelRenderer
+        from sprites import RotatedSpriteCache
+
+        self.atlas = TileAtlas(self.get_texture(tileset_path))
+        self.level = LevelRenderer(tilemap, self.atlas)
+        # Spike and crab poses, rendered on first draw at each tile size
+        self.sprites = RotatedSpriteCache(self.atlas)
 
     @staticmethod
     def get_texture(path):
         """Loads a texture from a given path."""
+        import pygame
+
         try:
-            texture = pygame.image.load(path).convert_alpha()
-            return pygame.transform.scale(texture, texture.get_rect().size)
+            return pygame.image.load(path).convert_alpha()
         except pygame.error as e:
             raise RuntimeError(f"Failed to load texture: {path}, {e}")
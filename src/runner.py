@@ -0,0 +1,57 @@
+"""
+Simulation on its own thread.
+
+SimulationRunner steps a Simulation as fast as it goes, independent of the
+window's frame rate, and publishes a snapshot.FrameSnapshot into a
+SnapshotBuffer whenever the renderer has taken the previous one. The render
+loop draws the latest snapshot at its own pace and never waits for an update.
+"""
+import threading
+import time
+
+from snapshot import SnapshotBuffer
+
+PAUSED_POLL_INTERVAL = 0.01  # Seconds between checks while paused
+SLOW_MODE_INTERVAL = 0.2  # Seconds between updates in slow mode, as in the single threaded loop
+
+
+class SimulationRunner:
+    def __init__(self, simulation, editor):
+        """
+        :param simulation: Simulation to step. Only this runner's thread touches it while running.
+        :param editor: Editor whose settings steer the simulation, read every update.
+        """
+        self.simulation = simulation
+        self.editor = editor
+        self.snapshots = SnapshotBuffer()
+        self.num_updates = 0
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        self.snapshots.publish(self.simulation.snapshot(self.editor, self.editor.settings.is_show_heatmap))
+        self.is_running = True
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        settings = self.editor.settings
+        while self.is_running:
+            if settings.is_pause:
+                time.sleep(PAUSED_POLL_INTERVAL)
+                continue
+
+            self.simulation.update(self.editor)
+            self.num_updates += 1
+            if self.snapshots.is_wanted:
+                self.snapshots.publish(self.simulation.snapshot(self.editor, settings.is_show_heatmap))
+
+            # Give the GIL to the render thread between updates rather than whenever the interpreter decides
+            time.sleep(SLOW_MODE_INTERVAL if settings.slow_mode else 0)
+
+    def stop(self):
+        """Finish the current update and stop. The simulation can be used from the calling thread again."""
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
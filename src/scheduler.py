@@ -0,0 +1,99 @@
+"""
+Time-budgeted stepping for the interactive loop.
+
+Instead of a fixed number of Simulation.update calls per rendered frame,
+AdaptiveStepper keeps a running estimate of what one update costs and fits as
+many as the rest of the frame has room for: UPDATE_BUDGET_SHARE of
+1 / settings.target_fps, measured from the start of the frame. Normally the
+updates are also paced to settings.sim_speed per second, so agents move at a
+watchable speed; with frame skip on, or drawing off, only the budget limits
+them.
+"""
+import time
+
+from configs import UPDATE_BUDGET_SHARE
+
+COST_SMOOTHING = 0.1  # Weight of the newest update's duration in the running estimate
+MAX_BACKLOG = 0.25  # Seconds of sim_speed updates that may pile up while the budget is short
+RATE_INTERVAL = 0.5  # Seconds between refreshes of the measured rate
+
+
+class RateCounter:
+    """Events per second of a growing total, refreshed every RATE_INTERVAL."""
+
+    def __init__(self):
+        self.rate = 0.0
+        self.last_total = 0
+        self.last_ts = time.perf_counter()
+
+    def sample(self, total):
+        """
+        :param total: Events so far.
+        :return: The latest rate.
+        """
+        now = time.perf_counter()
+        if now - self.last_ts >= RATE_INTERVAL:
+            self.rate = (total - self.last_total) / (now - self.last_ts)
+            self.last_total = total
+            self.last_ts = now
+        return self.rate
+
+
+class AdaptiveStepper:
+    def __init__(self, budget_share=UPDATE_BUDGET_SHARE):
+        """
+        :param budget_share: Share of a frame updates may take, the rest is left for drawing.
+        """
+        self.budget_share = budget_share
+        self.update_cost = 0.0  # Running estimate of one update, in seconds
+        self.backlog = 0.0  # Updates owed at sim_speed
+        self.last_ts = None
+        self.num_updates = 0
+        self.rate = RateCounter()
+
+    def step(self, simulation, editor, frame_start):
+        """
+        Run as many updates as this frame wants and has time for, at least one if it wants any.
+
+        :param frame_start: time.perf_counter() when the frame started.
+        :return: SimulationStats of the last update, None if there was none.
+        """
+        settings = editor.settings
+        is_paced = False
+        now = time.perf_counter()
+        elapsed = 0.0 if self.last_ts is None else now - self.last_ts
+        self.last_ts = now
+        if settings.is_pause:
+            return None
+
+        if settings.slow_mode:
+            wanted = 1  # The loop sleeps between frames, one update each
+        elif settings.is_frame_skip or not settings.is_draw or settings.sim_speed <= 0:
+            wanted = None  # As many as fit
+        else:
+            self.backlog = min(self.backlog + settings.sim_speed * elapsed, settings.sim_speed * MAX_BACKLOG)
+            wanted = int(self.backlog)
+            self.backlog -= wanted
+            is_paced = True
+
+        deadline = frame_start + self.budget_share / settings.target_fps
+        stats = None
+        num_done = 0
+        while wanted is None or num_done < wanted:
+            if num_done and now + self.update_cost > deadline:
+                break
+            start = now
+            stats = simulation.update(editor) or stats
+            now = time.perf_counter()
+            cost = now - start
+            self.update_cost = cost if not self.update_cost else self.update_cost + (cost - self.update_cost) * COST_SMOOTHING
+            num_done += 1
+
+        if is_paced:
+            # Updates the deadline cut off are still owed, a short budget only delays them
+            self.backlog = min(self.backlog + wanted - num_done, settings.sim_speed * MAX_BACKLOG)
+        self.num_updates += num_done
+        return stats
+
+    def updates_per_sec(self):
+        return self.rate.sample(self.num_updates)
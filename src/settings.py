@@ -0,0 +1,27 @@
+from configs import TARGET_FPS, SIM_SPEED
+
+
+class Settings:
+    def __init__(self):
+        self.is_pause = False
+        self.is_draw = True
+        self.is_restart = False
+        self.is_frame_skip = False
+        self.is_random_ai = False
+        self.is_show_egui = False
+        self.is_ai_enabled = True
+        self.is_show_multiple = False
+        self.is_show_heatmap = False  # Draw agent density over the level instead of the games
+        self.slow_mode = False
+        self.is_headless = False  # No display, no input polling
+        self.target_fps = TARGET_FPS
+        self.sim_speed = SIM_SPEED  # Updates per second while watching, 0 for as many as the frame budget allows
+
+
+class HeadlessEditor:
+    """Stands in for editor.Editor when there is no window to draw to."""
+
+    def __init__(self):
+        self.settings = Settings()
+        self.settings.is_headless = True
+        self.settings.is_draw = False
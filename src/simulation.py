@@ -1,25 +1,76 @@
 from population import Population
-from configs import NUM_FRAMES
+from configs import NUM_FRAMES, CHECKPOINT_INTERVAL
 from configs import UNIT_FRAME_SIZE, FRAME_SCALE, MUTATION_PROBABILITY
-from resources import init_resources  # Import the init_resources function
+from resources import RESOURCES, TEXTURES, init_resources  # Import the init_resources function
+from snapshot import FrameSnapshot
 
 
 
 class Simulation:
-    def __init__(self):
+    def __init__(self, num_games=10, pop_retention_rate=0.5, pop_expo_percentage=0.3, num_games_in_row=3, breeder=None):
         self.population = None  # Delay initialization
         self.frame_count = 0
         self.generation_count = 1
 
-    def initialize_population(self):
+        self.num_games = num_games
+        self.pop_retention_rate = pop_retention_rate
+        self.pop_expo_percentage = pop_expo_percentage
+        self.num_games_in_row = num_games_in_row
+        self.breeder = breeder
+        self.heatmap = None  # Created the first time the heatmap is shown
+        self.checkpoint_writer = None  # checkpoint.CheckpointWriter, see enable_checkpoints
+        self.checkpoint_interval = CHECKPOINT_INTERVAL
+
+    def initialize_population(self, genomes=None):
+        """
+        :param genomes: Moves of every game, random ones if None.
+        """
         # Now `RESOURCES` is guaranteed to be initialized
-        self.population = Population(
-            num_games=10,
-            pop_retention_rate=0.5,
-            pop_expo_percentage=0.3,
-            num_games_in_row=3,
+        self.population = self.new_population(genomes)
+
+    def new_population(self, genomes=None):
+        return Population(
+            num_games=self.num_games,
+            pop_retention_rate=self.pop_retention_rate,
+            pop_expo_percentage=self.pop_expo_percentage,
+            num_games_in_row=self.num_games_in_row,
+            breeder=self.breeder,
+            genomes=genomes,
         )
 
+    def enable_checkpoints(self, path, interval=CHECKPOINT_INTERVAL):
+        """
+        Save a checkpoint to path every interval generations, written on a background thread.
+        """
+        from checkpoint import CheckpointWriter
+
+        self.checkpoint_writer = CheckpointWriter(path)
+        self.checkpoint_interval = interval
+
+    def save_checkpoint(self):
+        """Queue a checkpoint of the current generation, returns without waiting for the disk."""
+        from checkpoint import Checkpoint
+
+        self.checkpoint_writer.save(Checkpoint.capture(self, RESOURCES.get().level_hash))
+
+    def resume(self, path):
+        """
+        Carry on from a checkpoint: its generation, with its genomes and random state.
+
+        :raises ValueError: If the checkpoint is unreadable or was saved on another level or horizon.
+        """
+        from checkpoint import load_checkpoint
+
+        load_checkpoint(path).restore(self, RESOURCES.get().level_hash)
+
+    def close(self):
+        """Save a last checkpoint, if checkpoints are on, and wait until it is on disk."""
+        if self.checkpoint_writer is None:
+            return
+        self.save_checkpoint()
+        self.checkpoint_writer.close()
+        self.checkpoint_writer = None
+
     def update(self, editor):
         """
         Update the simulation state.
@@ -33,11 +84,42 @@ class Simulation:
         self.population.update(self.frame_count, editor)
         self.frame_count += 1
 
-        if self.frame_count >= NUM_FRAMES and editor.settings.is_ai_enabled:
+        if editor.settings.is_show_heatmap:
+            if self.heatmap is None:
+                from heatmap import DensityHeatmap  # NumPy and pygame, only needed once it is shown
+                self.heatmap = DensityHeatmap(*self.population.games[0].lvl.size)
+            self.heatmap.accumulate([game.get_current_agent_pos() for game in self.population.games])
+
+        # End the generation early once every game is dead or complete
+        is_generation_over = self.frame_count >= NUM_FRAMES or self.population.is_finished()
+        if is_generation_over and editor.settings.is_ai_enabled:
             self.start_new_generation(not editor.settings.is_random_ai)
 
         return SimulationStats(self.frame_count, self.generation_count)
 
+    def run_generation(self, editor, engine=None):
+        """
+        Simulate the rest of the current generation and start the next one.
+
+        :param editor: Editor instance to check settings.
+        :param engine: Engine used by Population.evaluate, or None to step frame by frame with update.
+        :return: SimulationStats instance if not paused, otherwise None.
+        """
+        if editor.settings.is_pause:
+            return None
+
+        if engine is None:
+            generation_count = self.generation_count
+            while self.generation_count == generation_count:
+                self.update(editor)
+            return SimulationStats(self.frame_count, self.generation_count)
+
+        self.population.evaluate(engine)
+        self.frame_count = NUM_FRAMES
+        self.start_new_generation(not editor.settings.is_random_ai)
+
+        return SimulationStats(self.frame_count, self.generation_count)
+
     def start_new_generation(self, is_selection):
         """
         Start a new generation of the population.
@@ -48,24 +130,60 @@ class Simulation:
             self.population.selection()
         else:
             # Re-initialize population with the same parameters if not performing selection
-            self.population = Population(num_games=10, 
-                                         pop_retention_rate=0.5, 
-                                         pop_expo_percentage=0.3, 
-                                         num_games_in_row=3)
+            self.population = self.new_population()
 
         self.frame_count = 0
         self.generation_count += 1
 
-    def draw(self, editor):
+        if self.checkpoint_writer is not None and self.generation_count % self.checkpoint_interval == 0:
+            self.save_checkpoint()
+
+    def snapshot(self, editor, with_heat=False):
+        """
+        The games on screen as they are now, for drawing while the simulation carries on.
+
+        :param editor: Editor whose camera and settings decide which games are on screen.
+        :param with_heat: Include the heatmap colours, for drawing the heatmap from the snapshot.
+        """
+        return FrameSnapshot.capture(self, editor, with_heat)
+
+    def draw(self, editor, snapshot=None):
         """
         Draw the current state of the simulation.
 
         :param editor: Editor instance to check if drawing is enabled.
+        :param snapshot: FrameSnapshot to draw the games from, the current state if None.
         """
         if not editor.settings.is_draw:
             return
 
-        self.population.draw(editor)
+        if editor.settings.is_show_heatmap:
+            if snapshot is not None:
+                heat = snapshot.heat
+            else:
+                heat = self.heatmap.colors() if self.heatmap is not None else None
+            if heat is not None:
+                self.draw_heatmap(editor, heat)
+                return
+
+        (snapshot or self.snapshot(editor)).draw(editor)
+
+    def draw_heatmap(self, editor, heat):
+        """
+        Draw where the whole population has been, over the level background.
+
+        :param heat: DensityHeatmap.colors() to draw, e.g. from a snapshot; the live counts are never read.
+        """
+        import pygame
+
+        cam = editor.mouse_cam
+        scale_factor = UNIT_FRAME_SIZE * FRAME_SCALE * cam.scale
+        offset_x, offset_y = cam.world_to_screen((0, 0))
+        surface = pygame.display.get_surface()
+
+        # The static layers at one pixel per tileset pixel
+        background = TEXTURES.get().level.background(UNIT_FRAME_SIZE)
+        self.heatmap.draw(surface, offset_x, offset_y, scale_factor, background, colors=heat)
 
 class SimulationStats:
     def __init__(self, frame_count=1, generation_count=1):
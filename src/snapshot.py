@@ -0,0 +1,270 @@
+"""
+Immutable per-frame snapshots of a population, and drawing from them.
+
+Everything the game grid draws comes from a FrameSnapshot: for each game on
+screen the agent position, its flags, the frame it was last simulated on and
+when the agent was born, or just a colour per game when zoomed out to a pixel
+each, plus the heatmap colours while the heatmap is shown. The renderer never
+touches live Game objects or heatmap counts, so the simulation can keep
+stepping on another thread while a snapshot is drawn. SnapshotBuffer hands the newest snapshot
+from the simulation to the renderer.
+"""
+import threading
+from collections import namedtuple
+
+from agent import Agent
+from configs import UNIT_FRAME_SIZE, FRAME_SCALE, LOD_TILE_SIZE, LOD_MAX_BLOCKS, WINDOW_BACKGROUND_COLOR
+from resources import RESOURCES, TEXTURES
+
+
+def lod_tint(is_complete, is_dead):
+    """Colour a whole game is drawn in when zoomed out too far for sprites."""
+    if is_complete:
+        return 116, 242, 145
+    if is_dead:
+        return 120, 120, 120
+    return 255, 255, 255
+
+
+class GameSnapshot(namedtuple("GameSnapshot", ["pos", "is_key_collected", "is_complete", "is_dead", "frame_count",
+                                               "birth_ts"])):
+    """One game as it was on a frame, everything Game.draw needs."""
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, game):
+        return cls(game.agent.pos, game.is_key_collected, game.is_complete, game.is_dead, game.frame_count,
+                   game.agent.birth_ts)
+
+    def draw(self, offset_x, offset_y, scale_factor=UNIT_FRAME_SIZE * FRAME_SCALE):
+        """
+        :param scale_factor: Size of one tile on screen, in pixels.
+        """
+        import pygame
+        from renderer import tile_pixels
+
+        resources = RESOURCES.get()
+        textures = TEXTURES.get()
+        lvl = resources.lvl_info
+        surface = pygame.display.get_surface()
+        scale_factor = tile_pixels(scale_factor)  # Match the pre-rendered level
+        w = lvl.size[0] * scale_factor
+        h = lvl.size[1] * scale_factor
+
+        background = textures.level.background(scale_factor)
+        if background is None:
+            pygame.draw.rect(surface, (255, 255, 255), (offset_x, offset_y, w, h))
+        else:
+            surface.blit(background, (offset_x, offset_y))
+        if self.is_complete:
+            surface.fill((116, 242, 145), (offset_x, offset_y, w, h), special_flags=pygame.BLEND_RGB_MULT)
+
+        if not self.is_key_collected:
+            key_x, key_y = lvl.key
+            textures.atlas.blit(surface, "key", (key_x * scale_factor + offset_x, key_y * scale_factor + offset_y), scale_factor)
+
+        if not self.is_dead:
+            Agent.draw(self.pos, self.birth_ts, scale_factor, offset_x, offset_y)
+
+        resources.hazards.draw(self.frame_count, surface, textures.sprites, scale_factor, offset_x, offset_y)
+
+    def draw_lod(self, surface, offset_x, offset_y, scale_factor):
+        """
+        Cheap stand-in for draw when tiles are only a few pixels across: one block
+        for the level and one dot for the agent, no textures.
+        """
+        width, height = RESOURCES.get().lvl_info.size
+        w = width * scale_factor
+        h = height * scale_factor
+        surface.fill(lod_tint(self.is_complete, self.is_dead), (offset_x, offset_y, max(1, w), max(1, h)))
+
+        if not self.is_dead:
+            x, y = self.pos
+            dot_size = max(1, scale_factor)
+            surface.fill((200, 40, 40), (offset_x + x * scale_factor, offset_y + y * scale_factor, dot_size, dot_size))
+
+
+class FrameSnapshot:
+    __slots__ = ("frame_count", "generation_count", "games", "num_games_in_row", "pixels", "heat")
+
+    def __init__(self, frame_count, generation_count, games, num_games_in_row, pixels=None, heat=None):
+        """
+        :param games: Dict of population index -> GameSnapshot, only for the games that were on screen.
+        :param pixels: (cols, rows, RGB bytes) of the games on screen, one pixel each, instead of games when
+                       there were too many to draw one by one. None otherwise.
+        :param heat: heatmap.DensityHeatmap.colors() when the snapshot was taken, None without the heatmap.
+        """
+        self.frame_count = frame_count
+        self.generation_count = generation_count
+        self.games = games
+        self.num_games_in_row = num_games_in_row
+        self.pixels = pixels
+        self.heat = heat
+
+    @classmethod
+    def capture(cls, simulation, editor, with_heat=False):
+        """
+        Copy what the editor's camera shows: the first game without is_show_multiple,
+        otherwise the games on screen, or only their colours when zoomed out to a pixel
+        per game. The rest of the population is left out, so a capture costs what is
+        on screen rather than the population size.
+
+        :param with_heat: Include the heatmap colours, if the simulation has a heatmap.
+        """
+        import pygame
+
+        population = simulation.population
+        games = population.games
+        num_games_in_row = population.num_games_in_row
+        indices = (0,)
+        pixels = None
+        if editor.settings.is_show_multiple:
+            cols, rows, is_pixels = cls.visible_grid(editor.mouse_cam, pygame.display.get_surface().get_size(),
+                                                     len(games), num_games_in_row)
+            if is_pixels:
+                indices = ()
+                pixels = cols, rows, cls.capture_pixels(games, num_games_in_row, cols, rows)
+            else:
+                indices = [i for row in rows
+                           for i in range(row * num_games_in_row + cols.start,
+                                          min(row * num_games_in_row + cols.stop, len(games)))]
+
+        # tuple.__new__ skips namedtuple's argument handling, this runs for every visible game 60 times a second
+        new = tuple.__new__
+        captured = {}
+        for i in indices:
+            game = games[i]
+            captured[i] = new(GameSnapshot, (game.agent.pos, game.is_key_collected, game.is_complete, game.is_dead,
+                                             game.frame_count, game.agent.birth_ts))
+        # colors() returns a new array, later updates never change the one captured here
+        heat = simulation.heatmap.colors() if with_heat and simulation.heatmap is not None else None
+        return cls(simulation.frame_count, simulation.generation_count, captured, num_games_in_row, pixels, heat)
+
+    @staticmethod
+    def capture_pixels(games, num_games_in_row, cols, rows):
+        """
+        :param cols: Range of grid columns to take a pixel from.
+        :param rows: Range of grid rows, likewise.
+        :return: RGB bytes, len(cols) by len(rows), of each game's lod_tint.
+        """
+        empty = bytes(WINDOW_BACKGROUND_COLOR[:3])
+        tints = [bytes(lod_tint(is_complete, is_dead)) for is_dead in (False, True) for is_complete in (False, True)]
+        pixels = bytearray()
+        for row in rows:
+            start = row * num_games_in_row
+            row_games = games[start + cols.start:start + cols.stop:cols.step]
+            pixels += b"".join([tints[game.is_complete + 2 * game.is_dead] for game in row_games])
+            pixels += empty * (len(cols) - len(row_games))
+        return bytes(pixels)
+
+    @staticmethod
+    def cell_size():
+        """(width, height) in world pixels of one game in the grid, padding included."""
+        grid_padding = 40
+        game_width, game_height = RESOURCES.get().lvl_info.size
+        return (game_width * UNIT_FRAME_SIZE * FRAME_SCALE + grid_padding,
+                game_height * UNIT_FRAME_SIZE * FRAME_SCALE + grid_padding)
+
+    @classmethod
+    def visible_grid(cls, cam, screen_size, num_games, num_games_in_row):
+        """
+        :param cam: camera.MouseCam the grid is seen through.
+        :return: (cols, rows, is_pixels): ranges of the grid columns and rows on screen, and whether there are
+                 too many games zoomed out too far to draw them one by one. In pixel mode the ranges step over
+                 games that would land on the same screen pixel.
+        """
+        cell_width, cell_height = cls.cell_size()
+        num_rows = -(-num_games // num_games_in_row)  # Ceiling division
+
+        left, top, right, bottom = cam.visible_rect(screen_size)
+        first_col = max(0, int(left // cell_width))
+        last_col = min(num_games_in_row - 1, int(right // cell_width))
+        first_row = max(0, int(top // cell_height))
+        last_row = min(num_rows - 1, int(bottom // cell_height))
+        if last_col < first_col or last_row < first_row:
+            return range(0), range(0), False  # The whole grid is off screen
+
+        is_lod = UNIT_FRAME_SIZE * FRAME_SCALE * cam.scale < LOD_TILE_SIZE
+        is_pixels = is_lod and (last_row - first_row + 1) * (last_col - first_col + 1) > LOD_MAX_BLOCKS
+        col_step = row_step = 1
+        if is_pixels:
+            col_step = max(1, int(1 / (cell_width * cam.scale)))
+            row_step = max(1, int(1 / (cell_height * cam.scale)))
+        return range(first_col, last_col + 1, col_step), range(first_row, last_row + 1, row_step), is_pixels
+
+    def draw(self, editor):
+        """
+        Draw the first game or, with is_show_multiple, the captured games in a grid
+        num_games_in_row wide, through the editor's camera.
+        """
+        import pygame
+
+        cam = editor.mouse_cam
+        scale_factor = UNIT_FRAME_SIZE * FRAME_SCALE * cam.scale
+        if not editor.settings.is_show_multiple:
+            game = self.games.get(0)
+            if game is not None:
+                game.draw(*cam.world_to_screen((0, 0)), scale_factor)
+            return
+
+        surface = pygame.display.get_surface()
+        cell_width, cell_height = self.cell_size()
+        if self.pixels is not None:
+            self.draw_pixels(surface, cam, cell_width, cell_height, *self.pixels)
+            return
+
+        # Zoomed out past sprites: a block and a dot per game
+        is_lod = scale_factor < LOD_TILE_SIZE
+        for i, game in self.games.items():
+            row, col = divmod(i, self.num_games_in_row)
+            offset_x, offset_y = cam.world_to_screen((col * cell_width, row * cell_height))
+            if is_lod:
+                game.draw_lod(surface, offset_x, offset_y, scale_factor)
+            else:
+                game.draw(offset_x, offset_y, scale_factor)
+
+    @staticmethod
+    def draw_pixels(surface, cam, cell_width, cell_height, cols, rows, pixels):
+        """
+        Lowest level of detail: one pixel per visible game, scaled up to the grid's
+        size on screen and drawn in a single blit.
+
+        :param cols: Range of grid columns the pixels were captured from.
+        :param rows: Range of grid rows, likewise.
+        :param pixels: RGB bytes from capture_pixels.
+        """
+        import pygame
+
+        grid = pygame.image.frombuffer(pixels, (len(cols), len(rows)), "RGB")
+        size = (max(1, round(len(cols) * cols.step * cell_width * cam.scale)),
+                max(1, round(len(rows) * rows.step * cell_height * cam.scale)))
+        surface.blit(pygame.transform.scale(grid, size), cam.world_to_screen((cols.start * cell_width, rows.start * cell_height)))
+
+
+class SnapshotBuffer:
+    """
+    Double buffer between the simulation and the renderer. The simulation publishes
+    into the back slot and swaps; the renderer always reads the front one. Snapshots
+    are immutable, so the renderer can keep drawing one after a newer one arrived.
+    """
+
+    def __init__(self):
+        self.slots = [None, None]
+        self.front = 0
+        self.lock = threading.Lock()
+        self.is_wanted = True  # The renderer took the front snapshot, a new one is worth capturing
+        self.num_published = 0
+
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        with self.lock:
+            self.front = back
+            self.is_wanted = False
+            self.num_published += 1
+
+    def latest(self):
+        """The newest published snapshot, None before the first."""
+        with self.lock:
+            self.is_wanted = True
+            return self.slots[self.front]
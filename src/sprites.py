@@ -0,0 +1,92 @@
+"""
+Rotated enemy sprites.
+
+Spikes only ever turn in 10 degree steps and crabs only face four ways, so an
+enemy is always drawn in one of a few known poses. RotatedSpriteCache renders
+each pose the first time it is drawn at a tile size and hands out the same
+surface after that, instead of rotozooming per enemy per frame. Zooming only
+renders the poses actually on screen at the new size; a few recent sizes are
+kept, within a budget of RENDER_CACHE_MAX_SIZE squared pixels, and poses too
+large for it are rendered for every draw instead of cached.
+"""
+from pygame import transform
+
+from configs import RENDER_CACHE_MAX_SIZE
+from renderer import tile_pixels
+
+ANGLE_STEP = 10  # Degrees per angle bucket
+NUM_ANGLE_BUCKETS = 360 // ANGLE_STEP
+
+# Sprite name -> size in tiles before rotation
+SPRITE_SIZES = {
+    "small_spike": 1.0,
+    "large_spike": 2.0,
+    "crab": 1.0,
+}
+
+
+def angle_bucket(angle):
+    """Nearest bucket of a clockwise angle in degrees."""
+    return round(angle / ANGLE_STEP) % NUM_ANGLE_BUCKETS
+
+
+class RotatedSpriteCache:
+    def __init__(self, atlas, max_cached=4, max_pixels=RENDER_CACHE_MAX_SIZE ** 2):
+        """
+        :param atlas: renderer.TileAtlas to take the source sprites from.
+        :param max_cached: Number of tile sizes to keep rendered poses for.
+        :param max_pixels: Pixels all cached poses together may take up.
+        """
+        self.atlas = atlas
+        self.max_cached = max_cached
+        self.max_pixels = max_pixels
+        self.sizes = {}  # Pixels per tile -> {(sprite name, angle bucket): Surface}, least recently used first
+        self.num_pixels = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, angle, tile_size):
+        """
+        :param name: Sprite name in renderer.SPRITE_TILES.
+        :param angle: Clockwise rotation in degrees.
+        :param tile_size: Size of one tile on screen, in pixels.
+        :return: The rotated sprite, sized SPRITE_SIZES tiles across before rotation.
+        """
+        size = tile_pixels(tile_size)
+        key = (name, angle_bucket(angle))
+        poses = self.sizes.get(size)
+        if poses is not None:
+            if next(reversed(self.sizes)) != size:
+                self.sizes[size] = self.sizes.pop(size)  # Most recently used
+            sprite = poses.get(key)
+            if sprite is not None:
+                self.hits += 1
+                return sprite
+
+        self.misses += 1
+        sprite = self._render(name, key[1], size)
+        area = sprite.get_width() * sprite.get_height()
+
+        # Make room by dropping the least recently used other sizes
+        while self.sizes and (len(self.sizes) >= self.max_cached + (size in self.sizes)
+                              or self.num_pixels + area > self.max_pixels):
+            oldest = next(iter(self.sizes))
+            if oldest == size:
+                break
+            self.num_pixels -= sum(cached.get_width() * cached.get_height() for cached in self.sizes.pop(oldest).values())
+        if self.num_pixels + area > self.max_pixels:
+            return sprite  # Zoomed in too far to keep it around
+
+        self.sizes.setdefault(size, {})[key] = sprite
+        self.num_pixels += area
+        return sprite
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _render(self, name, bucket, size):
+        texture = self.atlas.sprite(name)
+        zoom = SPRITE_SIZES.get(name, 1.0) * size / texture.get_width()
+        # rotozoom turns counter-clockwise, enemies turn clockwise
+        return transform.rotozoom(texture, -bucket * ANGLE_STEP, zoom)
@@ -0,0 +1,177 @@
+"""
+Per-phase timings of the hot paths.
+
+When enabled, TIMINGS wraps the methods listed in PHASES with a timer that
+adds their wall time to the current frame. end_frame() pushes every phase's
+total for the frame into its ring buffer, so the buffers always line up frame
+by frame. Disabling puts the original methods back: turned off, the hot paths
+run exactly the code they would without this module.
+
+Phases nest: "selection" includes "calc_fitness", "population_update" and
+"evaluate" include "collision". Enemies have no phase of their own: their
+whole timeline is precomputed with the level, so per frame they only cost
+the collision lookups. Neither do the distance fields, levels load them
+precompiled; bench times solving them once instead.
+"""
+import csv
+import importlib
+import json
+import time
+from array import array
+
+# Phase name -> (module, class, method) it times
+PHASES = {
+    "population_update": ("population", "Population", "update"),
+    "evaluate": ("population", "Population", "evaluate"),
+    "collision": ("enemy", "HazardTimeline", "is_deadly"),
+    "calc_fitness": ("population", "Population", "calc_fitness"),
+    "selection": ("population", "Population", "selection"),
+    "draw_games": ("snapshot", "FrameSnapshot", "draw"),
+    "draw_heatmap": ("simulation", "Simulation", "draw_heatmap"),
+    "draw_overlay": ("editor", "Editor", "draw"),
+}
+DRAW_PHASES = ("draw_games", "draw_heatmap", "draw_overlay")  # Need pygame, headless runs leave them out
+TIMINGS_HISTORY = 240  # Frames kept per phase
+
+
+class RingBuffer:
+    """The last capacity floats appended, oldest overwritten first."""
+
+    def __init__(self, capacity):
+        self.values = array("d", bytes(8 * capacity))
+        self.capacity = capacity
+        self.head = 0  # Index the next value goes to
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self):
+        return self.values[self.head - 1] if self.count else 0.0
+
+    def to_list(self):
+        """Values oldest first."""
+        start = (self.head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            return self.values[start:start + self.count].tolist()
+        return self.values[start:].tolist() + self.values[:self.head].tolist()
+
+    def mean(self):
+        return sum(self.values) / self.count if self.count else 0.0
+
+
+class PhaseTimings:
+    def __init__(self, capacity=TIMINGS_HISTORY):
+        """
+        :param capacity: Frames of history kept per phase.
+        """
+        self.capacity = capacity
+        self.buffers = {}  # Phase name -> RingBuffer of milliseconds per frame
+        self.current = {}  # Phase name -> seconds spent so far this frame
+        self.totals = {}  # Phase name -> seconds spent since enabled
+        self.originals = {}  # Phase name -> (class, method name, method) it replaced
+        self.num_frames = 0  # Frames ended since enabled
+
+    @property
+    def is_enabled(self):
+        return bool(self.originals)
+
+    def enable(self, phases=None, draw=True):
+        """
+        Start timing.
+
+        :param phases: Names from PHASES to time, all of them by default.
+        :param draw: Include DRAW_PHASES, which import the rendering modules.
+        """
+        self.disable()
+        self.buffers.clear()
+        self.current.clear()
+        self.totals.clear()
+        self.num_frames = 0
+        for name in phases or PHASES:
+            if not draw and name in DRAW_PHASES:
+                continue
+            module_name, class_name, method_name = PHASES[name]
+            owner = getattr(importlib.import_module(module_name), class_name)
+            method = owner.__dict__[method_name]
+            setattr(owner, method_name, self.timed(name, method))
+            self.originals[name] = (owner, method_name, method)
+            self.buffers[name] = RingBuffer(self.capacity)
+            self.current[name] = 0.0
+            self.totals[name] = 0.0
+
+    def disable(self):
+        """Put every original method back. The recorded history stays."""
+        for owner, method_name, method in self.originals.values():
+            setattr(owner, method_name, method)
+        self.originals.clear()
+
+    def toggle(self, draw=True):
+        if self.is_enabled:
+            self.disable()
+        else:
+            self.enable(draw=draw)
+
+    def timed(self, name, method):
+        current = self.current
+        totals = self.totals
+        perf_counter = time.perf_counter
+
+        def timed_method(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                current[name] += elapsed
+                totals[name] += elapsed
+
+        timed_method.__wrapped__ = method
+        return timed_method
+
+    def end_frame(self):
+        """Close the current frame: push each phase's time into its history and start from zero."""
+        if not self.is_enabled:
+            return
+        for name, elapsed in self.current.items():
+            self.buffers[name].append(elapsed * 1000.0)
+            self.current[name] = 0.0
+        self.num_frames += 1
+
+    def rows(self):
+        """
+        :return: Recorded frames oldest first, each a dict of the frame number and
+                 milliseconds per phase.
+        """
+        columns = {name: buffer.to_list() for name, buffer in self.buffers.items()}
+        num_rows = min(map(len, columns.values()), default=0)
+        first_frame = self.num_frames - num_rows
+        return [
+            dict(frame=first_frame + i, **{name: values[i] for name, values in columns.items()})
+            for i in range(num_rows)
+        ]
+
+    def export(self, path):
+        """
+        Write the recorded frames to path, as JSON lines if it ends with .jsonl and CSV otherwise.
+
+        :return: Number of frames written.
+        """
+        rows = self.rows()
+        with open(path, "w", newline="") as file:
+            if path.endswith(".jsonl"):
+                for row in rows:
+                    file.write(json.dumps(row) + "\n")
+            else:
+                writer = csv.DictWriter(file, fieldnames=["frame", *self.buffers])
+                writer.writeheader()
+                writer.writerows(rows)
+        return len(rows)
+
+
+TIMINGS = PhaseTimings()
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from resources import init_resources
+from settings import HeadlessEditor
+from simulation import Simulation
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("num_games, pop_expo_percentage", [(50, 0), (5, 10)])
+def test_numpy_breeder_without_exploration_agents(num_games, pop_expo_percentage):
+    from breeding import Breeder
+
+    random.seed(0)
+    init_resources(headless=True, level="lvl1")
+    simulation = Simulation(
+        num_games=num_games,
+        pop_retention_rate=10,
+        pop_expo_percentage=pop_expo_percentage,
+        num_games_in_row=10,
+        breeder=Breeder(0),
+    )
+    simulation.initialize_population()
+
+    simulation.run_generation(HeadlessEditor())
+
+    assert simulation.generation_count == 2
+    assert len(simulation.population.games) == num_games